@@ -0,0 +1,84 @@
+import threading
+import time
+
+
+# -------------------
+# Off-thread annotation (headless mode)
+# -------------------
+class AsyncAnnotator:
+    """Draws and outputs annotated frames on a background thread.
+
+    Used in --headless mode when something still wants pictures (--record or
+    --preview). submit() just replaces the pending job and returns, so the
+    inference loop never waits on drawing. At most max_fps jobs per second are
+    drawn; anything submitted in between is skipped.
+
+    annotate(frame, *args) draws on the frame and returns it; every sink is
+    then called with the annotated frame. With keep_latest the newest one is
+    also kept for take_latest(), for work that must happen on the caller's
+    thread (cv2.imshow/waitKey are not thread-safe).
+    """
+
+    def __init__(self, annotate, sinks, max_fps=10.0, keep_latest=False):
+        self.annotate = annotate
+        self.sinks = list(sinks)
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.keep_latest = keep_latest
+
+        self.job = None
+        self.latest = None
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.last_drawn = 0.0
+
+        self.submitted = 0
+        self.drawn = 0
+
+        self.thread = threading.Thread(target=self._run, name='AsyncAnnotator', daemon=True)
+        self.thread.start()
+
+    def submit(self, frame, *args):
+        with self.cond:
+            self.submitted += 1
+            if time.monotonic() - self.last_drawn < self.min_interval:
+                return
+            self.job = (frame, args)
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.job is None and not self.stopped:
+                    self.cond.wait()
+                if self.job is None:
+                    return
+                frame, args = self.job
+                self.job = None
+                self.last_drawn = time.monotonic()
+
+            try:
+                frame = self.annotate(frame, *args)
+                for sink in self.sinks:
+                    sink(frame)
+                if self.keep_latest:
+                    with self.cond:
+                        self.latest = frame
+                self.drawn += 1
+            except Exception as e:
+                print("WARNING: annotation failed:", e)
+
+    def take_latest(self):
+        """The newest annotated frame not taken yet, else None."""
+        with self.cond:
+            frame, self.latest = self.latest, None
+        return frame
+
+    def stats(self):
+        with self.cond:
+            return {'submitted': self.submitted, 'drawn': self.drawn}
+
+    def close(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        self.thread.join(timeout=5.0)
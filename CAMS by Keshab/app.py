@@ -1,37 +1,106 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session
+from flask import Flask, Response, g, render_template, jsonify, request, redirect, url_for, session
 from werkzeug.security import generate_password_hash, check_password_hash
+import hashlib
+import json
+import math
+import queue
 import sqlite3
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+
+from db_pool import ConnectionPool
+from history import HISTORY_DB, RESOLUTIONS, init_history, pick_resolution, query_history
+from history import record as record_sample
+from metrics import CONTENT_TYPE, REGISTRY, register_stats
+from occupancy import CAMS_DB, OFFLINE_STATUS, upsert_area_status
 
 app = Flask(__name__)
 app.secret_key = "my_cams_secret_123"
 
-DB_PATH = "cams.db"
+DB_PATH = CAMS_DB
+MAX_BATCH_SIZE = 500  # records accepted per /update_status/batch request
+SQLITE_INT_MAX = 2**63 - 1  # largest value a SQLite INTEGER column holds
+MAX_CLOCK_SKEW = 300  # seconds a posted timestamp may be ahead of this server's clock
+MAX_TIMESTAMP = 32503679999  # 2999-12-31T23:59:59Z; Windows' localtime() stops at the year 3000
+SSE_HEARTBEAT = 15  # seconds between keep-alive comments on /areas/stream
+AREA_CACHE_TTL = 30  # seconds; also picks up rows the detector writes straight to cams.db
+DB_POOL_SIZE = 8  # idle SQLite connections kept per database (0 => new connection per request)
+DB_BUSY_TIMEOUT = 5.0  # seconds a request waits on the detector's write lock
+
+db_pool = ConnectionPool(DB_PATH, size=DB_POOL_SIZE, busy_timeout=DB_BUSY_TIMEOUT)
+history_pool = ConnectionPool(HISTORY_DB, size=DB_POOL_SIZE, busy_timeout=DB_BUSY_TIMEOUT)
 
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """cams.db connection for this request, back to the pool on app context teardown."""
+    if "db" not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+
+def get_history_connection():
+    if "history_db" not in g:
+        g.history_db = history_pool.acquire()
+    return g.history_db
+
+
+# =======================
+# 🔹 METRICS
+# =======================
+
+REQUEST_MS = REGISTRY.histogram("cams_http_request_ms", "Request latency by route", labels=("route", "method", "status"))
+LOCK_WAIT_MS = REGISTRY.histogram("cams_lock_wait_ms", "Time spent waiting for in-process locks", labels=("lock",),
+                                  buckets=(0.01, 0.1, 0.5, 1, 5, 10, 50, 100, 500))
+register_stats("cams_db_pool", {"cams": db_pool, "history": history_pool}, counters=("opened", "reused", "closed"),
+               gauges=("idle",), label="db")
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_MS.labels(route, request.method, response.status_code).observe((time.perf_counter() - started) * 1000.0)
+    return response
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    conn = g.pop("db", None)
+    if conn is not None:
+        db_pool.release(conn)
+    conn = g.pop("history_db", None)
+    if conn is not None:
+        history_pool.release(conn)
 
 # This makes 'username' available in ALL templates automatically
 @app.context_processor
 def inject_user():
     return dict(username=session.get("username"))
 
-@app.route("/areas")
-def areas():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+def fetch_areas(conn, names=None):
+    """area_status rows in the JSON shape the dashboard uses (optionally only `names`)."""
+    query = """
         SELECT area, people_count, status,
                datetime(updated_at, 'unixepoch', 'localtime') AS readable_time
         FROM area_status
-        ORDER BY area
-    """)
-    rows = cursor.fetchall()
-    conn.close()
+    """
+    params = ()
+    if names:
+        query += " WHERE area IN (%s)" % ",".join("?" * len(names))
+        params = tuple(names)
+    rows = conn.execute(query + " ORDER BY area", params).fetchall()
 
     # convert to JSON-serializable format
     result = []
@@ -41,46 +110,364 @@ def areas():
             "people_count": row["people_count"],
             "status": row["status"],
             "time_ago": row["readable_time"],
-            "is_outdated": False
+            "is_outdated": row["status"] == OFFLINE_STATUS
         })
-    return jsonify(result)
+    return result
+
+
+# =======================
+# 🔹 AREA STATUS CACHE
+# =======================
+
+class AreaStatusCache:
+    """Keeps the current area_status snapshot in memory.
+
+    The snapshot is rebuilt on the first request after invalidate() (called on
+    every write) or after `ttl` seconds. It holds the pre-serialized /areas JSON
+    plus an ETag / Last-Modified pair for conditional GETs.
+    """
+
+    def __init__(self, ttl=AREA_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entry = None
+        self.loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self):
+        t0 = time.perf_counter()
+        with self.lock:
+            cache_lock_wait.observe((time.perf_counter() - t0) * 1000.0)
+            if self.entry is not None and time.time() - self.loaded_at < self.ttl:
+                self.hits += 1
+                return self.entry
+
+            self.misses += 1
+            conn = get_db_connection()
+            body = app.json.dumps(fetch_areas(conn))
+            rows = conn.execute("SELECT * FROM area_status ORDER BY updated_at DESC").fetchall()
+
+            etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+            if self.entry is not None and self.entry["etag"] == etag:
+                last_modified = self.entry["last_modified"]  # TTL refresh, nothing changed
+            else:
+                last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            self.entry = {"body": body, "rows": rows, "etag": etag, "last_modified": last_modified}
+            self.loaded_at = time.time()
+            return self.entry
+
+    def invalidate(self):
+        with self.lock:
+            self.loaded_at = 0.0  # keep the entry so an unchanged reload keeps its Last-Modified
+            self.invalidations += 1
+
+    def count_not_modified(self):
+        with self.lock:
+            self.not_modified += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+            }
+
+
+cache_lock_wait = LOCK_WAIT_MS.labels("area_cache")
+area_cache = AreaStatusCache()
+register_stats("cams_area_cache", area_cache, counters=("hits", "misses", "not_modified", "invalidations"))
+
+
+def conditional_response(response, etag, last_modified):
+    # answers 304 when If-None-Match / If-Modified-Since already match
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers["Cache-Control"] = "no-cache"
+    response.make_conditional(request)
+    if response.status_code == 304:
+        area_cache.count_not_modified()
+    return response
+
+
+def areas_changed(conn, names):
+    """Call after committing area_status writes."""
+    area_cache.invalidate()
+    broadcaster.publish(fetch_areas(conn, sorted(names)))
+
+
+@app.route("/areas")
+def areas():
+    entry = area_cache.get()
+    response = app.response_class(entry["body"], mimetype="application/json")
+    return conditional_response(response, entry["etag"], entry["last_modified"])
+
+
+def parse_time_arg(value, default):
+    # unix seconds ("1700000000") or ISO 8601 ("2025-10-25T09:00"); ValueError if neither or out of range
+    # (OverflowError/OSError from a far-off ISO date, e.g. before 1970 on Windows)
+    if value is None or value == "":
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = datetime.fromisoformat(value).timestamp()
+    if not math.isfinite(seconds) or not 0 <= seconds <= MAX_TIMESTAMP:
+        raise ValueError(f"time out of range: {value}")
+    return int(seconds)
+
+
+@app.route("/areas/<name>/history")
+def area_history(name):
+    """Occupancy over time from the minute/hour/day rollups.
+
+    Query args: from, to (unix seconds or ISO 8601, default last 24 h) and
+    resolution (minute | hour | day, default picked from the range).
+    Buckets start on the server's local time boundaries (day = local midnight);
+    utc_offset is that offset in seconds at `to`.
+    """
+    now = int(time.time())
+    try:
+        end = parse_time_arg(request.args.get("to"), now)
+        start = parse_time_arg(request.args.get("from"), max(0, end - 86400))
+    except (ValueError, OverflowError, OSError):
+        return jsonify({"error": "from/to must be unix seconds or ISO 8601"}), 400
+    if start >= end:
+        return jsonify({"error": "from must be before to"}), 400
+
+    resolution = request.args.get("resolution") or pick_resolution(start, end)
+    if resolution not in RESOLUTIONS:
+        return jsonify({"error": f"resolution must be one of {', '.join(RESOLUTIONS)}"}), 400
+
+    points = query_history(get_history_connection(), name, start, end, resolution)
+
+    return jsonify({
+        "area": name,
+        "from": start,
+        "to": end,
+        "resolution": resolution,
+        "utc_offset": time.localtime(end).tm_gmtoff,
+        "points": points,
+    })
+
+
+@app.route("/areas/cache_stats")
+def areas_cache_stats():
+    return jsonify(area_cache.stats())
+
+
+@app.route("/db_stats")
+def db_stats():
+    return jsonify({"cams": db_pool.stats(), "history": history_pool.stats()})
+
+def valid_record(area, count, timestamp, now):
+    """True if an /update_status(/batch) record can be stored.
+
+    A timestamp further than MAX_CLOCK_SKEW ahead of now (milliseconds, a
+    wrong clock) is refused: it would make every later update for the area stale.
+    """
+    return (isinstance(area, str) and bool(area.strip())
+            and isinstance(count, int) and not isinstance(count, bool) and 0 <= count <= SQLITE_INT_MAX
+            and isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool)
+            and math.isfinite(timestamp) and 0 <= timestamp <= now + MAX_CLOCK_SKEW)
+
+
+def record_history(samples):
+    """Add received (area, timestamp, people_count) samples to history.db.
+
+    Every valid sample is kept, also ones too old for area_status (a
+    detector replaying its spool). Offline records are not samples.
+    """
+    if not samples:
+        return
+    conn = get_history_connection()
+    try:
+        for area, timestamp, count in samples:
+            record_sample(conn, area, timestamp, count)
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        print("⚠️ History write failed:", e)
+
+
+RECORD_ERROR = ("need area (text), people_count (int >= 0), "
+                f"timestamp (unix seconds, at most {MAX_CLOCK_SKEW} s ahead of the server)")
+
 
 @app.route("/update_status", methods=["POST"])
 def update_status():
-    data = request.get_json()
-    if not data:
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
         return jsonify({"error": "No JSON received"}), 400
 
+    now = int(time.time())
     area = data.get("area")
     count = data.get("people_count")
-    timestamp = data.get("timestamp", int(time.time()))
-
-    # Decide the area status
-    if count == 0:
-        status = "empty"
-    elif count < 10:
-        status = "open"
-    elif count < 30:
-        status = "busy"
-    else:
-        status = "closed"
+    timestamp = data.get("timestamp", now)
+    if not valid_record(area, count, timestamp, now):
+        return jsonify({"error": RECORD_ERROR}), 400
+    # the only status a detector may set itself: its camera is disconnected
+    status = OFFLINE_STATUS if data.get("status") == OFFLINE_STATUS else None
 
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO area_status (area, people_count, status, updated_at)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(area) DO UPDATE SET
-            people_count = excluded.people_count,
-            status = excluded.status,
-            updated_at = excluded.updated_at
-    """, (area, count, status, timestamp))
+    updated = upsert_area_status(cursor, area, count, int(timestamp), status)
     conn.commit()
-    conn.close()
+    if updated:
+        areas_changed(conn, [area])
+    if status is None:
+        record_history([(area, timestamp, count)])
+
+    if not updated:
+        return jsonify({"message": "Ignored stale update (newer data already stored)"}), 200
 
     print(f"✅ Received update ...")
     return jsonify({"message": "Data updated successfully"}), 200
 
+
+@app.route("/update_status/batch", methods=["POST"])
+def update_status_batch():
+    """Bulk version of /update_status.
+
+    Body: [{"area": "Library", "people_count": 12, "timestamp": 1700000000}, ...]
+    ("status": "offline" may be added, like for /update_status)
+    Records that fail valid_record() are reported as "invalid". All records are written in one transaction. A record older than what is
+    already stored for its area is reported as "stale" and not written.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        return jsonify({"error": "Expected a JSON array of records"}), 400
+    if len(data) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} records per request"}), 413
+
+    results = []
+    counts = {"updated": 0, "stale": 0, "invalid": 0}
+    changed = set()
+    samples = []
+    now = int(time.time())
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for record in data:
+            area = record.get("area") if isinstance(record, dict) else None
+            count = record.get("people_count") if isinstance(record, dict) else None
+            timestamp = record.get("timestamp", now) if isinstance(record, dict) else None
+
+            if not valid_record(area, count, timestamp, now):
+                results.append({"area": area, "result": "invalid", "error": RECORD_ERROR})
+                counts["invalid"] += 1
+                continue
+
+            status = OFFLINE_STATUS if record.get("status") == OFFLINE_STATUS else None
+            if status is None:
+                samples.append((area, timestamp, count))
+            if upsert_area_status(cursor, area, count, int(timestamp), status):
+                results.append({"area": area, "result": "updated"})
+                counts["updated"] += 1
+                changed.add(area)
+            else:
+                results.append({"area": area, "result": "stale"})
+                counts["stale"] += 1
+        conn.commit()
+        if changed:
+            areas_changed(conn, changed)
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({"error": f"Database error: {e}"}), 500
+    record_history(samples)
+
+    print(f"✅ Received batch of {len(data)} ...")
+    return jsonify({"results": results, **counts}), 200
+
+# =======================
+# 🔹 LIVE UPDATES (Server-Sent Events)
+# =======================
+
+class AreaBroadcaster:
+    """Fans changed area rows out to every open /areas/stream connection.
+
+    Every open stream holds one server thread, so max_subscribers (None =>
+    no limit, set by serve.py from its thread count) keeps some threads free
+    for /areas and /update_status. subscribe() returns None once it is reached.
+    """
+
+    def __init__(self, max_pending=50, max_subscribers=None):
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self.subscribers = set()
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_pending)
+        with self.lock:
+            if self.max_subscribers is not None and len(self.subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    def publish(self, areas):
+        if not areas:
+            return
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(areas)
+            except queue.Full:
+                # slow client: forget its oldest update rather than block the writer
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    q.put_nowait(areas)
+                except queue.Full:
+                    pass  # another publisher refilled it: this slow client just misses the update
+
+
+broadcaster = AreaBroadcaster()
+REGISTRY.function("cams_sse_clients", "Open /areas/stream connections", lambda: len(broadcaster.subscribers))
+REGISTRY.function("cams_sse_rejected_total", "/areas/stream requests turned away (client polls instead)",
+                  lambda: broadcaster.rejected, kind="counter")
+
+
+@app.route("/areas/stream")
+def areas_stream():
+    """Pushes `areas` events with only the areas that changed.
+
+    503 when all stream slots are taken; the dashboard then polls /areas.
+    """
+    q = broadcaster.subscribe()
+    if q is None:
+        return jsonify({"error": "Too many live connections, poll /areas instead"}), 503, {"Retry-After": "60"}
+
+    def stream():
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                changed = q.get(timeout=SSE_HEARTBEAT)
+                yield f"event: areas\ndata: {json.dumps(changed)}\n\n"
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+
+    response = Response(stream(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # runs when the server closes the response, even if the stream was never started
+    response.call_on_close(lambda: broadcaster.unsubscribe(q))
+    return response
+
+
 # =======================
 # 🔹 LOGIN FLOW
 # =======================
@@ -101,7 +488,6 @@ def login():
 
         conn = get_db_connection()
         user = conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
-        conn.close()
 
         if user and check_password_hash(user["password"], password):
             session["username"] = username
@@ -124,14 +510,12 @@ def signup():
     existing_user = conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
 
     if existing_user:
-        conn.close()
         return render_template("login.html", error="Username already exists! Try logging in.")
 
     # create new user
     conn.execute("INSERT INTO users (username, password, created_at) VALUES (?, ?, ?)", 
                  (username, password, created_at))
     conn.commit()
-    conn.close()
 
     session["username"] = username
     session["is_new_user"] = True
@@ -152,13 +536,14 @@ def index():
     if "username" not in session:
         return redirect(url_for("login"))
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM area_status ORDER BY updated_at DESC")
-    rows = cursor.fetchall()
-    conn.close()
+    entry = area_cache.get()
+    # the page also depends on who is logged in
+    etag = hashlib.sha1(f'{entry["etag"]}:{session["username"]}'.encode("utf-8")).hexdigest()
+    if request.if_none_match.contains(etag):
+        return conditional_response(app.response_class(), etag, entry["last_modified"])
 
-    return render_template("index.html", areas=rows)
+    response = app.make_response(render_template("index.html", areas=entry["rows"]))
+    return conditional_response(response, etag, entry["last_modified"])
 
 
 @app.route("/about")
@@ -171,17 +556,25 @@ def credits():
     return render_template("credits.html")
 
 
-if __name__ == "__main__":
+def init_databases():
+    """Create what the app needs before serving (app.py and serve.py call this)."""
     # make sure the `users` table exists
-    conn = get_db_connection()
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with app.app_context():
+        conn = get_db_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL
+            )
+        """)
+        conn.commit()
 
-    app.run(debug=True)
\ No newline at end of file
+    # make sure the history store exists (filled from /update_status(/batch), see record_history)
+    init_history(HISTORY_DB)
+
+
+if __name__ == "__main__":
+    # development server only; use serve.py for anything else
+    init_databases()
+    app.run(debug=True)
@@ -0,0 +1,291 @@
+import glob
+import json
+import os
+import platform
+import shutil
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detections import extract_detections
+from tracker import iou_matrix
+
+
+BACKENDS = ('pt', 'onnx', 'openvino')
+BENCHMARK_CACHE = 'backend_benchmark.json'
+
+# exported backends must stay this close to PyTorch on the sample image
+COUNT_TOLERANCE = 1  # boxes
+IOU_TOLERANCE = 0.85  # mean best-match IoU
+
+
+# -------------------
+# Export + cache
+# -------------------
+def exported_path(model_path, backend, imgsz, int8=False):
+    """Where the exported copy of model_path is cached (next to the .pt file)."""
+    stem, ext = os.path.splitext(model_path)
+    tag = f"_{imgsz}{'_int8' if int8 else ''}"
+    if backend == 'onnx':
+        return f"{stem}{tag}.onnx"
+    if backend == 'openvino':
+        return f"{stem}{tag}_openvino_model"
+    if ext == '.pt' and not stem.endswith('_fused'):
+        return f"{stem}_fused.pt"  # PyTorch: same weights with Conv+BatchNorm already folded
+    return model_path
+
+
+def _is_fresh(target, model_path):
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(model_path)
+
+
+def export_model(model_path, backend, imgsz=640, int8=False, calib_data=None):
+    """Export model_path to ONNX/OpenVINO once and return the cached path.
+
+    INT8: OpenVINO uses Ultralytics' post-training quantization (calib_data is
+    a dataset YAML, Ultralytics' default is used if None). ONNX uses
+    onnxruntime's dynamic quantization, which needs no calibration data.
+    PyTorch models are not exported, but a fused copy is cached so the layers
+    are not folded again on every start.
+    """
+    target = exported_path(model_path, backend, imgsz, int8)
+    if target == model_path or _is_fresh(target, model_path):
+        return target
+
+    from ultralytics import YOLO
+
+    if backend == 'pt':
+        try:
+            model = YOLO(model_path, task='detect')
+            model.model.fuse(verbose=False)
+            tmp = f"{target}.{os.getpid()}.tmp"  # several processes may start at once
+            model.save(tmp)
+            os.replace(tmp, target)
+        except Exception as e:
+            print(f"⚠️ Could not cache a fused copy of {model_path} ({e}), loading it as is")
+            return model_path
+        return target
+
+    print(f"📦 Exporting {model_path} to {backend}{' (INT8)' if int8 else ''} at {imgsz}px, this only happens once...")
+    model = YOLO(model_path, task='detect')
+
+    if backend == 'onnx':
+        out = model.export(format='onnx', imgsz=imgsz)
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(out, target, weight_type=QuantType.QUInt8)
+            os.remove(out)
+        else:
+            os.replace(out, target)
+    elif backend == 'openvino':
+        kwargs = {'format': 'openvino', 'imgsz': imgsz, 'int8': int8}
+        if int8 and calib_data:
+            kwargs['data'] = calib_data
+        out = model.export(**kwargs)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(out, target)
+    else:
+        raise ValueError(f'unknown backend "{backend}"')
+
+    return target
+
+
+def load_backend(model_path, backend, imgsz=640, int8=False, calib_data=None):
+    from ultralytics import YOLO
+    return YOLO(export_model(model_path, backend, imgsz, int8, calib_data), task='detect')
+
+
+def check_export(model_path, backend, imgsz=640, int8=False, model=None, reference=None):
+    """(ok, count difference, mean IoU) of the cached export vs PyTorch on the sample image.
+
+    Runs once per export: the result is saved next to it (<export>.check.json)
+    and reused until the export changes. model/reference are loaded if not given.
+    """
+    target = exported_path(model_path, backend, imgsz, int8)
+    check_path = f"{target}.check.json"
+    export_mtime = int(os.path.getmtime(target))
+    try:
+        with open(check_path, 'r', encoding='utf-8') as f:
+            check = json.load(f)
+        if check.get('export_mtime') == export_mtime:
+            return check['ok'], check['count_diff'], check['mean_iou']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    from ultralytics import YOLO
+    model = model or YOLO(target, task='detect')
+    reference = reference or load_backend(model_path, 'pt', imgsz)
+    count_diff, mean_iou = compare_detections(reference, model, sample_frame(imgsz), imgsz)
+    ok = count_diff <= COUNT_TOLERANCE and mean_iou >= IOU_TOLERANCE
+    try:
+        with open(check_path, 'w', encoding='utf-8') as f:
+            json.dump({'export_mtime': export_mtime, 'ok': ok, 'count_diff': count_diff,
+                       'mean_iou': round(mean_iou, 4)}, f, indent=2)
+    except OSError as e:
+        print("⚠️ Could not save the export check:", e)
+    return ok, count_diff, mean_iou
+
+
+# -------------------
+# Start-up: load + warm up off the main thread
+# -------------------
+class ModelLoader:
+    """Loads a model and runs one warm-up inference on a background thread.
+
+    Most of the start-up cost is in the first inference (torch imports,
+    predictor setup), so the caller can open its camera/stream meanwhile and
+    call result() before the first frame. A backend that fails to load, or
+    whose export does not match PyTorch (check_export), falls back to PyTorch.
+    """
+
+    def __init__(self, model_path, backend='pt', imgsz=640, int8=False, warmup_size=(640, 480)):
+        self.model_path = model_path
+        self.backend = backend
+        self.imgsz = imgsz
+        self.int8 = int8
+        self.warmup_size = warmup_size
+        self.model = None
+        self.error = None
+        self.load_s = 0.0
+        self.warmup_s = 0.0
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='ModelLoader', daemon=True)
+        self.thread.start()
+
+    def _load(self):
+        backend = self.backend
+        try:
+            if backend == 'auto':
+                backend = pick_backend(self.model_path, imgsz=self.imgsz, int8=self.int8)
+            int8 = self.int8 and backend != 'pt'
+            model = load_backend(self.model_path, backend, self.imgsz, int8)
+            if backend != 'pt':
+                ok, count_diff, mean_iou = check_export(self.model_path, backend, self.imgsz, int8, model=model)
+                if not ok:
+                    raise ValueError(f"results differ from PyTorch (count diff {count_diff}, IoU {mean_iou:.2f})")
+            return model, backend
+        except Exception as e:
+            if backend == 'pt':
+                raise
+            print(f"WARNING: {backend} backend failed ({e}), falling back to PyTorch.")
+            return load_backend(self.model_path, 'pt', self.imgsz), 'pt'
+
+    def _run(self):
+        try:
+            t0 = time.perf_counter()
+            self.model, self.backend = self._load()
+            self.load_s = time.perf_counter() - t0
+        except Exception as e:
+            self.error = e
+            self.done.set()
+            return
+
+        w, h = self.warmup_size
+        t0 = time.perf_counter()
+        try:
+            self.model(np.zeros((h, w, 3), dtype=np.uint8), imgsz=self.imgsz, verbose=False)
+        except Exception as e:
+            print("⚠️ Warm-up inference failed:", e)
+        self.warmup_s = time.perf_counter() - t0
+        self.done.set()
+
+    def result(self):
+        """Wait for the model; raises the load error if it could not be loaded."""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.model
+
+
+# -------------------
+# Benchmark + accuracy check
+# -------------------
+def sample_frame(imgsz):
+    """A real picture from assets/ if there is one, otherwise random noise."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(here, 'assets', '*.jpg'))):
+        frame = cv2.imread(path)
+        if frame is not None:
+            return frame
+    return np.random.default_rng(0).integers(0, 255, (imgsz, imgsz, 3), dtype=np.uint8)
+
+
+def compare_detections(reference, candidate, frame, imgsz, min_conf=0.5):
+    """(count difference, mean best-match IoU) of candidate vs reference on one frame."""
+    ref_xyxy = extract_detections(reference(frame, imgsz=imgsz, verbose=False)[0], min_conf)[0]
+    cand_xyxy = extract_detections(candidate(frame, imgsz=imgsz, verbose=False)[0], min_conf)[0]
+    count_diff = abs(len(ref_xyxy) - len(cand_xyxy))
+    if len(ref_xyxy) == 0 or len(cand_xyxy) == 0:
+        return count_diff, 1.0 if len(ref_xyxy) == len(cand_xyxy) else 0.0
+    return count_diff, float(iou_matrix(ref_xyxy, cand_xyxy).max(axis=1).mean())
+
+
+def time_model(model, frame, imgsz, runs=10, warmup=2):
+    """Median milliseconds per inference."""
+    for _ in range(warmup):
+        model(frame, imgsz=imgsz, verbose=False)
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        model(frame, imgsz=imgsz, verbose=False)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(times))
+
+
+def benchmark_backends(model_path, imgsz=640, int8=False, calib_data=None, candidates=BACKENDS, runs=10):
+    """Time every backend that exports/loads and matches PyTorch. Returns {backend: ms}."""
+    frame = sample_frame(imgsz)
+    reference = load_backend(model_path, 'pt', imgsz)
+    results = {'pt': time_model(reference, frame, imgsz, runs)}
+    print(f"⏱️ pt: {results['pt']:.1f} ms")
+
+    for backend in candidates:
+        if backend == 'pt':
+            continue
+        try:
+            model = load_backend(model_path, backend, imgsz, int8, calib_data)
+            ok, count_diff, mean_iou = check_export(model_path, backend, imgsz, int8, model=model, reference=reference)
+            if not ok:
+                print(f"⚠️ {backend}: results differ from PyTorch (count diff {count_diff}, IoU {mean_iou:.2f}), skipping")
+                continue
+            results[backend] = time_model(model, frame, imgsz, runs)
+            print(f"⏱️ {backend}: {results[backend]:.1f} ms (count diff {count_diff}, IoU {mean_iou:.2f})")
+        except Exception as e:
+            print(f"⚠️ {backend}: not available ({e})")
+    return results
+
+
+def pick_backend(model_path, imgsz=640, int8=False, calib_data=None, cache_path=BENCHMARK_CACHE):
+    """Fastest backend for this machine, model and input size.
+
+    The benchmark result is cached in cache_path so it only runs again when
+    the model file, input size or machine changes.
+    """
+    key = '|'.join([platform.node(), platform.machine(), str(os.cpu_count()),
+                    os.path.abspath(model_path), str(int(os.path.getmtime(model_path))),
+                    str(imgsz), 'int8' if int8 else 'fp32'])
+    cache = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    if key in cache:
+        return cache[key]['backend']
+
+    print("⏱️ Benchmarking inference backends (cached after the first run)...")
+    timings = benchmark_backends(model_path, imgsz, int8, calib_data)
+    best = min(timings, key=timings.get)
+    cache[key] = {'backend': best, 'timings_ms': timings}
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print("⚠️ Could not save backend benchmark:", e)
+    print(f"🏁 Fastest backend: {best} ({timings[best]:.1f} ms)")
+    return best
@@ -0,0 +1,243 @@
+import argparse
+import glob
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from backends import BACKENDS, check_export, export_model
+from detections import extract_detections
+from zones import ZoneCounter, load_zones
+
+
+IMG_EXT = {'.jpg', '.jpeg', '.png', '.bmp'}
+VID_EXT = {'.avi', '.mov', '.mp4', '.mkv', '.wmv'}
+
+BATCH_SIZE = 16  # frames per model call
+IMAGES_PER_UNIT = 64  # images handed to a worker at a time
+MIN_FRAMES_PER_UNIT = 256  # video frames per worker task (each task starts with one seek)
+
+
+# -------------------
+# Work units
+# -------------------
+def list_units(source, workers, stride=1):
+    """Split a folder of images/videos (or one video) into independent work units.
+
+    ('images', [paths]) or ('video', path, first_frame, end_frame). Videos are cut
+    into frame ranges so one long file still keeps every worker busy.
+    """
+    if os.path.isdir(source):
+        files = sorted(glob.glob(os.path.join(source, '*')))
+    else:
+        files = [source]
+    images = [f for f in files if os.path.splitext(f)[1].lower() in IMG_EXT]
+    videos = [f for f in files if os.path.splitext(f)[1].lower() in VID_EXT]
+
+    units = [('images', images[i:i + IMAGES_PER_UNIT]) for i in range(0, len(images), IMAGES_PER_UNIT)]
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+        cap.release()
+        if total <= 0:
+            units.append(('video', path, 0, None))  # unknown length: one sequential task
+            continue
+        per_unit = max(MIN_FRAMES_PER_UNIT, math.ceil(total / (workers * 4)))
+        per_unit = math.ceil(per_unit / stride) * stride  # keep the stride aligned across units
+        units += [('video', path, start, min(start + per_unit, total)) for start in range(0, total, per_unit)]
+    return units
+
+
+def read_unit(unit, stride=1, resolution=None):
+    """Yield (source, frame_index, time_s, frame) for one work unit."""
+    if unit[0] == 'images':
+        for idx, path in enumerate(unit[1]):
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"⚠️ Could not read {path}, skipping")
+                continue
+            if resolution:
+                frame = cv2.resize(frame, resolution)
+            yield path, 0, None, frame
+        return
+
+    _, path, start, end = unit
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    idx = start
+    try:
+        while end is None or idx < end:
+            # grab() without retrieve() skips the decode-to-BGR of frames we don't use
+            if not cap.grab():
+                break
+            if idx % stride == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    if resolution:
+                        frame = cv2.resize(frame, resolution)
+                    yield path, idx, round(idx / fps, 3) if fps else None, frame
+            idx += 1
+    finally:
+        cap.release()
+
+
+# -------------------
+# Worker process
+# -------------------
+_worker = {}
+
+
+def _init_worker(model_path, settings, threads):
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from ultralytics import YOLO
+    _worker['model'] = YOLO(model_path, task='detect')
+    _worker['settings'] = settings
+    _worker['zones'] = ZoneCounter(settings['zones']) if settings['zones'] else None
+
+
+def _infer(frames, meta):
+    settings = _worker['settings']
+    zone_counter = _worker['zones']
+    if zone_counter is not None:
+        # like the live detector: only the zones' bounding box goes to the model
+        crops = [zone_counter.crop(frame) for frame in frames]
+    else:
+        crops = [(frame, (0, 0)) for frame in frames]
+    results = _worker['model']([crop for crop, _ in crops], imgsz=settings['imgsz'], verbose=False)
+    rows = []
+    for (source, idx, t), (_, offset), result in zip(meta, crops, results):
+        xyxy, cls, conf = extract_detections(result, settings['min_conf'], settings['classes'], offset=offset)
+        zone_counts = {}
+        if zone_counter is not None:
+            # boxes outside every zone are not counted
+            zone_idx, zone_counts = zone_counter.assign(xyxy)
+            conf = conf[zone_idx >= 0]
+        row = {'source': source, 'frame': idx, 'time_s': t, 'people_count': len(conf)}
+        for name, count in zone_counts.items():
+            row[f'zone:{name}'] = count
+        rows.append(row)
+    return rows
+
+
+def process_unit(unit):
+    """Decode one unit and run it through the model in fixed-size batches."""
+    settings = _worker['settings']
+    rows, frames, meta = [], [], []
+    for source, idx, t, frame in read_unit(unit, settings['stride'], settings['resolution']):
+        frames.append(frame)
+        meta.append((source, idx, t))
+        if len(frames) == settings['batch_size']:
+            rows += _infer(frames, meta)
+            frames, meta = [], []
+    if frames:
+        rows += _infer(frames, meta)
+    return rows
+
+
+# -------------------
+# Driver
+# -------------------
+def write_counts(rows, out_path):
+    import polars as pl
+    df = pl.DataFrame(rows, infer_schema_length=None).sort(['source', 'frame'])
+    if out_path.lower().endswith('.parquet'):
+        df.write_parquet(out_path)
+    else:
+        df.write_csv(out_path)
+    return df
+
+
+def run_batch(model_path, source, out_path, workers=None, batch_size=BATCH_SIZE, imgsz=640,
+              min_conf=0.5, classes=None, resolution=None, zones=None, stride=1,
+              backend='pt', int8=False):
+    """Count people in every image/video frame under source and write one row per frame.
+
+    Each worker process decodes its own units and runs its own copy of the
+    model with cpu_count // workers threads, so nothing but the count rows
+    crosses process boundaries and throughput grows with the number of cores.
+    """
+    workers = workers or os.cpu_count() or 1
+    model_file = export_model(model_path, backend, imgsz, int8)  # export once, before forking
+    if backend != 'pt':
+        ok, count_diff, mean_iou = check_export(model_path, backend, imgsz, int8)
+        if not ok:
+            print(f"WARNING: {backend} results differ from PyTorch (count diff {count_diff}, IoU {mean_iou:.2f}), "
+                  f"using PyTorch.")
+            model_file = export_model(model_path, 'pt', imgsz)
+    units = list_units(source, workers, stride)
+    if not units:
+        raise ValueError(f'no images or videos found in "{source}"')
+
+    settings = {
+        'imgsz': imgsz, 'min_conf': min_conf, 'classes': classes, 'batch_size': batch_size,
+        'resolution': resolution, 'zones': zones, 'stride': stride,
+    }
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🗂️ {len(units)} work units on {workers} worker(s) x {threads} thread(s), batch size {batch_size}")
+
+    rows = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(model_file, settings, threads)) as pool:
+        for done, unit_rows in enumerate(pool.map(process_unit, units), start=1):
+            rows += unit_rows
+            elapsed = time.perf_counter() - t0
+            print(f"  {done}/{len(units)} units, {len(rows)} frames, {len(rows) / elapsed:.1f} images/s")
+    elapsed = time.perf_counter() - t0
+
+    if rows:
+        write_counts(rows, out_path)
+    return {
+        'frames': len(rows),
+        'seconds': round(elapsed, 2),
+        'images_per_second': round(len(rows) / elapsed, 2) if elapsed else 0.0,
+        'workers': workers,
+        'output': out_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-process image folders / video archives offline and '
+                                                 'write per-frame people counts to CSV or Parquet.')
+    parser.add_argument('--model', help='Path to YOLO model file', required=True)
+    parser.add_argument('--source', help='Image/video folder or a single video file', required=True)
+    parser.add_argument('--out', help='Output file, .csv or .parquet (default: "counts.parquet")',
+                        default='counts.parquet')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per core)')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help=f'Frames per model call (default: {BATCH_SIZE})')
+    parser.add_argument('--stride', type=int, default=1, help='Only process every Nth video frame (default: 1)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size (default: 640)')
+    parser.add_argument('--thresh', type=float, default=0.5, help='Minimum confidence threshold (default: 0.5)')
+    parser.add_argument('--resolution', help='Resize frames to WxH before inference (needed if --zones were drawn at it)',
+                        default=None)
+    parser.add_argument('--zones', help='JSON file of polygon zones; adds a count column per zone', default=None)
+    parser.add_argument('--backend', choices=BACKENDS, default='pt', help='Inference backend (default: pt)')
+    parser.add_argument('--int8', action='store_true', help='Use an INT8-quantized export (onnx/openvino only)')
+    args = parser.parse_args()
+
+    resolution = None
+    if args.resolution:
+        try:
+            resolution = (int(args.resolution.split('x')[0]), int(args.resolution.split('x')[1]))
+        except Exception:
+            parser.error("--resolution malformed. Expected format '640x480'")
+
+    report = run_batch(args.model, args.source, args.out, workers=args.workers, batch_size=args.batch,
+                       imgsz=args.imgsz, min_conf=args.thresh, resolution=resolution,
+                       zones=load_zones(args.zones) if args.zones else None, stride=max(1, args.stride),
+                       backend=args.backend, int8=args.int8)
+    print(f"🏁 {report['frames']} frames in {report['seconds']} s "
+          f"({report['images_per_second']} images/s on {report['workers']} workers) -> {report['output']}")
+
+
+if __name__ == '__main__':
+    main()
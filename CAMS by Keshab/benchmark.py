@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS, load_backend
+from db_writer import DBWriter
+from detections import extract_detections
+from history import HISTORY_DB, init_history, record_statements
+from load_test import percentiles
+from occupancy import CAMS_DB, OccupancySink
+from tracker import PeopleTracker
+from uploader import TelemetryUploader
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CLIP = os.path.join(HERE, 'assets', 'People.mp4')
+STAGES = ('decode', 'resize', 'inference', 'postprocess', 'db_write', 'telemetry')
+
+
+# -------------------
+# Frame sources
+# -------------------
+def synthetic_frames(count, size=(1280, 720), seed=0):
+    """Deterministic clip: a fixed noisy background with a few boxes walking across it."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    background = cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (0, 0), 3)
+    walkers = [(rng.integers(0, w), rng.integers(0, h // 2), rng.integers(-8, 8), rng.integers(80, 200))
+               for _ in range(5)]
+    for i in range(count):
+        frame = background.copy()
+        for x, y, speed, height in walkers:
+            x0 = int(x + speed * i) % w
+            cv2.rectangle(frame, (x0, int(y)), (x0 + int(height) // 3, int(y + height)), (40, 60, 160), -1)
+        yield frame
+
+
+def video_frames(path, count):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f'could not open "{path}"')
+    try:
+        for _ in range(count):
+            ok, frame = cap.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+# -------------------
+# Helpers
+# -------------------
+class PeakRSS:
+    """Samples this process' resident memory on a background thread."""
+
+    def __init__(self, interval=0.05):
+        import psutil
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = self.process.memory_info().rss
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+        return self.peak
+
+
+def start_sink_server():
+    """Local stand-in for /update_status so telemetry goes over real HTTP."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/update_status"
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# -------------------
+# Benchmark
+# -------------------
+def run_benchmark(model_path, source=None, frames=300, warmup=10, resolution=(640, 480), imgsz=640,
+                  backend='pt', min_conf=0.5, seed=0):
+    """Run the detector pipeline headless on a fixed clip and time every stage.
+
+    Every frame goes through every stage (no motion gate, no frame dropping),
+    in one thread, so two runs on the same machine do the same work. DB writes
+    and telemetry go to a temporary database / local stand-in server through
+    the same DBWriter, OccupancySink and TelemetryUploader the detector uses;
+    the time recorded is what the inference loop pays for them.
+    """
+    cv2.setRNGSeed(seed)
+    try:
+        import torch
+        torch.manual_seed(seed)
+    except ImportError:
+        pass
+
+    model = load_backend(model_path, backend, imgsz=imgsz)
+    workdir = tempfile.mkdtemp(prefix='cams_bench_')
+    cams_db = os.path.join(workdir, CAMS_DB)
+    history_db = os.path.join(workdir, HISTORY_DB)
+    conn = sqlite3.connect(cams_db)
+    conn.execute("""CREATE TABLE area_status (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, area TEXT UNIQUE,
+        people_count INTEGER, status TEXT, updated_at INTEGER)""")
+    conn.close()
+    init_history(history_db)
+
+    writer = DBWriter(batch_size=200, flush_interval=2.0)
+    occupancy = OccupancySink(cams_db, writer=writer)
+    server, url = start_sink_server()
+    uploader = TelemetryUploader(url, spool_path=None, verbose=False)
+    tracker = PeopleTracker()
+
+    if source is None or source == 'synthetic':
+        frame_iter = synthetic_frames(frames + warmup, seed=seed)
+        source = 'synthetic'
+    else:
+        frame_iter = video_frames(source, frames + warmup)
+
+    timings = {stage: [] for stage in STAGES}
+    memory = PeakRSS()
+    processed = 0
+    t_end = time.perf_counter()
+    loop_start = t_end if warmup == 0 else None  # set when the last warm-up frame is done
+    while True:
+        t0 = time.perf_counter()
+        frame = next(frame_iter, None)
+        if frame is None:
+            break
+        t1 = time.perf_counter()
+        if resolution:
+            frame = cv2.resize(frame, resolution)
+        t2 = time.perf_counter()
+        results = model(frame, imgsz=imgsz, verbose=False)
+        t3 = time.perf_counter()
+        xyxy, cls, conf = extract_detections(results[0], min_conf)
+        tracker.update(xyxy)
+        count = tracker.count
+        t4 = time.perf_counter()
+        now = time.time()
+        for sql, params in record_statements('Benchmark', now, count):
+            writer.submit(history_db, sql, params)
+        occupancy.update('Benchmark', count, now)
+        t5 = time.perf_counter()
+        uploader.submit('Benchmark', count, now)
+        t_end = time.perf_counter()
+
+        processed += 1
+        if processed == warmup:
+            loop_start = t_end
+        if processed > warmup:
+            for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t_end - t5)):
+                timings[stage].append(seconds)
+
+    measured = processed - warmup
+    elapsed = t_end - loop_start if loop_start is not None and measured > 0 else 0.0
+
+    occupancy.close()
+    writer.close()
+    uploader.close()
+    server.shutdown()
+    peak_rss = memory.stop()
+    db_stats = writer.stats()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model': os.path.basename(model_path),
+            'backend': backend,
+            'imgsz': imgsz,
+            'source': source if source == 'synthetic' else os.path.basename(source),
+            'resolution': f'{resolution[0]}x{resolution[1]}' if resolution else None,
+            'warmup_frames': warmup,
+            'seed': seed,
+        },
+        'frames': max(0, measured),
+        'seconds': round(elapsed, 3),
+        'throughput_fps': round(measured / elapsed, 2) if elapsed else 0.0,
+        'peak_rss_mb': round(peak_rss / (1024 * 1024), 1),
+        'stages': {stage: percentiles(samples) for stage, samples in timings.items()},
+        'db_writer': {'flushes': db_stats['flushes'], 'max_flush_ms': round(db_stats['max_flush_ms'], 2),
+                      'rows_written': db_stats['rows_written']},
+    }
+
+
+def print_report(report, baseline=None):
+    print(f"🏁 {report['frames']} frames in {report['seconds']} s -> {report['throughput_fps']} FPS, "
+          f"peak RSS {report['peak_rss_mb']} MB")
+    print(f"   {'stage':12s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for stage, r in report['stages'].items():
+        if not r['count']:
+            continue
+        line = f"   {stage:12s} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} {r['p99_ms']:9.3f}"
+        old = (baseline or {}).get('stages', {}).get(stage, {})
+        if old.get('p50_ms'):
+            line += f"   p50 {(r['p50_ms'] / old['p50_ms'] - 1) * 100:+.1f}% vs baseline"
+        print(line)
+    if baseline and baseline.get('throughput_fps'):
+        print(f"   throughput {(report['throughput_fps'] / baseline['throughput_fps'] - 1) * 100:+.1f}% vs baseline "
+              f"({baseline['meta'].get('commit')})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every stage of the detection pipeline on a fixed clip (headless).')
+    parser.add_argument('--model', help='Path to YOLO model file', required=True)
+    parser.add_argument('--source', default=DEFAULT_CLIP if os.path.exists(DEFAULT_CLIP) else 'synthetic',
+                        help='Video file, or "synthetic" for a generated clip (default: assets/People.mp4)')
+    parser.add_argument('--frames', type=int, default=300, help='Frames to measure (default: 300)')
+    parser.add_argument('--warmup', type=int, default=10, help='Frames run first and not measured (default: 10)')
+    parser.add_argument('--resolution', default='640x480', help='Resize frames to WxH, "none" to keep (default: 640x480)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size (default: 640)')
+    parser.add_argument('--backend', choices=BACKENDS, default='pt', help='Inference backend (default: pt)')
+    parser.add_argument('--out', default='benchmark.json', help='JSON report (default: benchmark.json)')
+    parser.add_argument('--compare', default=None, help='Earlier JSON report to compare against')
+    args = parser.parse_args()
+    if args.warmup < 0:
+        parser.error('--warmup must be 0 or more')
+
+    resolution = None
+    if args.resolution and args.resolution.lower() != 'none':
+        try:
+            resolution = (int(args.resolution.split('x')[0]), int(args.resolution.split('x')[1]))
+        except Exception:
+            parser.error("--resolution malformed. Expected format '640x480'")
+
+    report = run_benchmark(args.model, args.source, frames=args.frames, warmup=args.warmup,
+                           resolution=resolution, imgsz=args.imgsz, backend=args.backend)
+    if report['frames'] == 0:
+        print('ERROR: no frames were measured (clip shorter than --warmup?)')
+        sys.exit(1)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+# -------------------
+# Source parsing
+# -------------------
+img_ext_list = ['.jpg','.JPG','.jpeg','.JPEG','.png','.PNG','.bmp','.BMP']
+vid_ext_list = ['.avi','.mov','.mp4','.mkv','.wmv']
+
+
+def parse_source(source):
+    """(source_type, argument) for a --source / cameras.json source string.
+
+    source_type is folder, image, video, usb, picamera or stream. The argument
+    is the camera index for usb/picamera and the path/URL otherwise, i.e. what
+    cv2.VideoCapture takes for video/usb/stream. Raises ValueError for an
+    unsupported file extension or a bad usb index.
+    """
+    if os.path.isdir(source):
+        return 'folder', source
+    if os.path.isfile(source):
+        _, ext = os.path.splitext(source)
+        if ext in img_ext_list:
+            return 'image', source
+        if ext in vid_ext_list:
+            return 'video', source
+        raise ValueError(f'File extension {ext} is not supported.')
+    if source.startswith('usb'):
+        try:
+            return 'usb', int(source[3:])
+        except ValueError:
+            raise ValueError('usb index parse failed. Example usage: usb0') from None
+    if source.startswith('picamera'):
+        try:
+            return 'picamera', int(source[8:])
+        except ValueError:
+            return 'picamera', 0
+    # numeric webcam indices passed directly as "0", anything else is a stream URL
+    # (checked later by trying to open it)
+    try:
+        return 'usb', int(source)
+    except ValueError:
+        return 'stream', source
+
+
+# -------------------
+# Threaded frame capture
+# -------------------
+class FrameGrabber:
+    """Reads frames from a camera/stream/video on a background thread.
+
+    Frames go into a small ring buffer. For live sources the oldest frame is
+    dropped when the buffer is full, so the inference loop always gets the
+    freshest frame instead of a backlog of stale ones. Video files have no
+    "freshest" frame, so for them the reader waits for space instead of dropping.
+
+    With `reopen` (a function returning a new, opened capture), a failed read
+    does not end the source: the capture is reopened on this thread, waiting
+    `backoff` seconds before the first try and doubling on every try (also
+    when a reopened capture gives no frames) up to `max_backoff`. Only a real
+    frame resets the wait and counts as reconnected. read() simply has no new
+    frames meanwhile. on_disconnect() and on_reconnect() are called from this
+    thread once per outage: when frames stop and when they flow again.
+    """
+
+    def __init__(self, cap, source_type, buffer_size=2, drop_frames=None, reopen=None,
+                 backoff=1.0, max_backoff=30.0, on_disconnect=None, on_reconnect=None):
+        self.cap = cap
+        self.source_type = source_type
+        self.buffer = deque(maxlen=max(1, int(buffer_size)))
+        self.drop_frames = (source_type != 'video') if drop_frames is None else drop_frames
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.ended = False
+
+        self.reopen = reopen
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_delay = backoff
+        self.on_disconnect = on_disconnect
+        self.on_reconnect = on_reconnect
+        self.connected = True
+        self.down_since = None
+
+        # counters (read them through stats())
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.disconnects = 0
+        self.reconnects = 0
+        self.downtime = 0.0
+
+        self.thread = threading.Thread(target=self._run, name='FrameGrabber', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _grab(self):
+        # decode happens here, off the inference thread
+        if self.source_type == 'picamera':
+            frame_bgra = self.cap.capture_array()
+            if frame_bgra is None:
+                return None
+            return cv2.cvtColor(np.copy(frame_bgra), cv2.COLOR_BGRA2BGR)
+
+        ret, frame = self.cap.read()
+        if not ret or frame is None:
+            return None
+        return frame
+
+    def _run(self):
+        while not self.stopped:
+            try:
+                frame = self._grab()
+            except Exception as e:
+                print("WARNING: Frame capture failed:", e)
+                frame = None
+
+            if frame is None and self.reopen is not None and not self.stopped:
+                if self._reconnect():
+                    continue
+
+            with self.cond:
+                if frame is None:
+                    self.ended = True
+                    self.cond.notify_all()
+                    return
+
+                if not self.drop_frames:
+                    # wait for the consumer instead of throwing frames away
+                    while len(self.buffer) == self.buffer.maxlen and not self.stopped:
+                        self.cond.wait(0.1)
+                elif len(self.buffer) == self.buffer.maxlen:
+                    self.frames_dropped += 1  # deque drops the oldest on append
+
+                self.buffer.append(frame)
+                self.frames_captured += 1
+                self.retry_delay = self.backoff  # frames flow again: next outage starts from the short wait
+                downtime = None
+                if not self.connected:
+                    self.connected = True
+                    downtime = time.monotonic() - self.down_since
+                    self.downtime += downtime
+                    self.down_since = None
+                    self.reconnects += 1
+                self.cond.notify_all()
+
+            if downtime is not None:
+                print(f"🔌 Reconnected after {downtime:.1f} s ({self.reconnects} reconnects so far)")
+                if self.on_reconnect is not None:
+                    self.on_reconnect()
+
+    def _reconnect(self):
+        """Reopen the source until it opens (True) or the grabber is stopped (False).
+
+        Called again if the reopened capture gives no frames; that is the same
+        outage, so it is not counted or reported twice.
+        """
+        with self.cond:
+            dropped = self.connected
+            if dropped:
+                self.connected = False
+                self.disconnects += 1
+                self.down_since = time.monotonic()
+        if dropped:
+            print(f"🔌 {self.source_type} disconnected, reconnecting...")
+            if self.on_disconnect is not None:
+                self.on_disconnect()
+        else:
+            print(f"🔌 Reopened but no frames, next try in {self.retry_delay:.1f} s")
+        try:
+            self.cap.release()
+        except Exception:
+            pass
+
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.stopped, timeout=self.retry_delay)
+                if self.stopped:
+                    return False
+            self.retry_delay = min(self.retry_delay * 2, self.max_backoff)
+            try:
+                cap = self.reopen()
+            except Exception as e:
+                print("WARNING: Reopening the source failed:", e)
+                cap = None
+            if cap is not None and cap.isOpened():
+                break
+            if cap is not None:
+                cap.release()
+            print(f"🔌 Still disconnected, next try in {self.retry_delay:.1f} s")
+
+        with self.cond:
+            self.cap = cap
+        return True
+
+    def read(self, timeout=None):
+        """Return the freshest frame, or None once the source has ended.
+
+        Any older frames still in the buffer are discarded (live sources) or
+        returned in order on later calls (video files).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while not self.buffer and not self.ended and not self.stopped:
+                wait = 0.5 if deadline is None else deadline - time.monotonic()
+                if wait <= 0:
+                    return None
+                self.cond.wait(min(wait, 0.5))
+
+            if not self.buffer:
+                return None
+
+            if self.drop_frames:
+                frame = self.buffer.pop()
+                self.frames_dropped += len(self.buffer)
+                self.buffer.clear()
+            else:
+                frame = self.buffer.popleft()
+            self.frames_processed += 1
+            self.cond.notify_all()
+            return frame
+
+    def stats(self):
+        with self.cond:
+            return {
+                'captured': self.frames_captured,
+                'processed': self.frames_processed,
+                'dropped': self.frames_dropped,
+                'buffered': len(self.buffer),
+                'connected': 1 if self.connected else 0,
+                'disconnects': self.disconnects,
+                'reconnects': self.reconnects,
+                'downtime_seconds': self.downtime + (time.monotonic() - self.down_since if self.down_since else 0.0),
+            }
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        if self.thread.is_alive():
+            self.thread.join(timeout=2.0)
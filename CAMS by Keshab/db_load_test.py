@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import app as cams_app
+from db_pool import ConnectionPool
+from load_test import percentiles
+from occupancy import UPSERT_SQL, get_status
+
+
+# -------------------
+# Load test: /areas latency while cams.db is being written
+# -------------------
+def legacy_connection(db_path):
+    """What get_db_connection() used to do: a fresh connection per call, default journal."""
+    def get_db_connection():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    return get_db_connection
+
+
+def run_mode(mode, source_db, seconds, readers, posters, detectors, pool_size):
+    workdir = tempfile.mkdtemp(prefix="cams_load_")
+    db_path = os.path.join(workdir, "cams.db")
+    shutil.copy(source_db, db_path)
+
+    original = cams_app.get_db_connection, cams_app.db_pool
+    if mode == "legacy":
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        cams_app.get_db_connection = legacy_connection(db_path)
+    else:
+        cams_app.db_pool = ConnectionPool(db_path, size=pool_size, busy_timeout=cams_app.DB_BUSY_TIMEOUT)
+    cams_app.area_cache.ttl = 0  # every /areas goes to SQLite: we're measuring the DB path, not the cache
+    cams_app.area_cache.invalidate()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = {"areas": [], "update_status": [], "detector_write": []}
+    errors = {"areas": 0, "update_status": 0, "detector_write": 0}
+
+    def record(kind, started, ok):
+        with lock:
+            latencies[kind].append(time.perf_counter() - started)
+            if not ok:
+                errors[kind] += 1
+
+    def reader():
+        client = cams_app.app.test_client()
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                ok = client.get("/areas").status_code == 200
+            except Exception:
+                ok = False
+            record("areas", t0, ok)
+
+    def poster(idx):
+        client = cams_app.app.test_client()
+        n = 0
+        while not stop.is_set():
+            n += 1
+            t0 = time.perf_counter()
+            try:
+                ok = client.post("/update_status", json={"area": f"Load {idx}", "people_count": n % 40}).status_code == 200
+            except Exception:
+                ok = False
+            record("update_status", t0, ok)
+            time.sleep(0.01)
+
+    def detector(idx):
+        # the detector's DBWriter: its own connection, small transactions straight to cams.db
+        conn = sqlite3.connect(db_path, timeout=5.0)
+        n = 0
+        while not stop.is_set():
+            n += 1
+            t0 = time.perf_counter()
+            try:
+                with conn:
+                    for area in range(5):
+                        count = (n + area) % 40
+                        conn.execute(UPSERT_SQL, (f"Camera {idx}-{area}", count, get_status(count), int(time.time())))
+                ok = True
+            except sqlite3.Error:
+                ok = False
+            record("detector_write", t0, ok)
+            time.sleep(0.005)
+        conn.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=poster, args=(i,)) for i in range(posters)]
+    threads += [threading.Thread(target=detector, args=(i,)) for i in range(detectors)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    cams_app.get_db_connection, pool = original[0], cams_app.db_pool
+    cams_app.db_pool = original[1]
+    cams_app.area_cache.ttl = cams_app.AREA_CACHE_TTL
+    cams_app.area_cache.invalidate()
+    if mode != "legacy":
+        pool.close_all()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"mode": mode, "seconds": round(elapsed, 2)}
+    for kind in latencies:
+        report[kind] = percentiles(latencies[kind])
+        report[kind]["errors"] = errors[kind]
+        report[kind]["per_second"] = round(len(latencies[kind]) / elapsed, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure /areas latency while the detector and '
+                                                 '/update_status write to cams.db (pooled vs per-request connections).')
+    parser.add_argument('--db', help='Database to copy for the test (default: "cams.db")', default=cams_app.DB_PATH)
+    parser.add_argument('--seconds', type=float, default=10.0, help='Duration of each run (default: 10)')
+    parser.add_argument('--readers', type=int, default=8, help='Threads polling /areas (default: 8)')
+    parser.add_argument('--posters', type=int, default=2, help='Threads posting /update_status (default: 2)')
+    parser.add_argument('--detectors', type=int, default=2, help='Threads writing cams.db directly (default: 2)')
+    parser.add_argument('--pool-size', type=int, default=cams_app.DB_POOL_SIZE, help='Connection pool size')
+    parser.add_argument('--mode', choices=['legacy', 'pooled', 'both'], default='both')
+    parser.add_argument('--json', help='Also write the results to this file', default=None)
+    args = parser.parse_args()
+
+    modes = ['legacy', 'pooled'] if args.mode == 'both' else [args.mode]
+    reports = []
+    for mode in modes:
+        print(f"⏱️ {mode}: {args.seconds:.0f} s, {args.readers} readers, {args.posters} posters, {args.detectors} detector writers")
+        report = run_mode(mode, args.db, args.seconds, args.readers, args.posters, args.detectors, args.pool_size)
+        reports.append(report)
+        for kind in ("areas", "update_status", "detector_write"):
+            r = report[kind]
+            if r["count"]:
+                print(f"   {kind:15s} {r['per_second']:8.1f}/s  p50 {r['p50_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms  "
+                      f"p99 {r['p99_ms']:7.2f} ms  errors {r['errors']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import queue
+import sqlite3
+import threading
+
+
+# -------------------
+# Pooled SQLite connections (web app)
+# -------------------
+class ConnectionPool:
+    """Reusable, pre-configured SQLite connections for request handlers.
+
+    Every connection is opened once with WAL journaling (readers don't wait for
+    the detector's writes), a busy timeout (writers wait instead of failing with
+    "database is locked") and synchronous=NORMAL (safe with WAL, far fewer
+    fsyncs). sqlite3 keeps up to `cached_statements` prepared statements per
+    connection, so reusing connections also means the hot queries are only
+    parsed once per connection instead of once per request.
+
+    acquire() hands out an idle connection (or opens one), release() puts it
+    back; at most `size` idle connections are kept. size=0 turns pooling off:
+    a new connection per acquire(), closed on release().
+    """
+
+    def __init__(self, db_path, size=8, busy_timeout=5.0, synchronous="NORMAL", cached_statements=256):
+        self.db_path = db_path
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self.idle = queue.LifoQueue(maxsize=size) if size else None
+        self.lock = threading.Lock()
+
+        self.opened = 0
+        self.reused = 0
+        self.closed = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass  # another connection holds a lock; it's already WAL after the first success
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        with self.lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self):
+        if self.idle is not None:
+            try:
+                conn = self.idle.get_nowait()
+                with self.lock:
+                    self.reused += 1
+                return conn
+            except queue.Empty:
+                pass
+        return self._connect()
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # a handler bailed out mid-write
+            if self.idle is not None:
+                self.idle.put_nowait(conn)
+                return
+        except (sqlite3.Error, queue.Full):
+            pass
+        conn.close()
+        with self.lock:
+            self.closed += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": self.size,
+                "idle": self.idle.qsize() if self.idle is not None else 0,
+                "opened": self.opened,
+                "reused": self.reused,
+                "closed": self.closed,
+            }
+
+    def close_all(self):
+        while self.idle is not None:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
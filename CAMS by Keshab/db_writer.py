@@ -0,0 +1,134 @@
+import queue
+import sqlite3
+import threading
+import time
+from itertools import groupby
+
+from metrics import REGISTRY
+
+
+_STOP = object()
+
+FLUSH_MS = REGISTRY.histogram('cams_db_flush_ms', 'Time per batched SQLite transaction (DBWriter)')
+
+
+# -------------------
+# Batched background SQLite writer
+# -------------------
+class DBWriter:
+    """Queues INSERT/UPSERT statements and writes them from one background thread.
+
+    One connection per database file stays open for the life of the writer
+    (WAL journal, synchronous=NORMAL). Queued statements are flushed in a single
+    transaction per database whenever batch_size rows are waiting or
+    flush_interval seconds have passed, so the detector does one fsync per
+    batch instead of one per frame. close() flushes whatever is left.
+    """
+
+    def __init__(self, batch_size=50, flush_interval=1.0, max_queue=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.connections = {}
+        self.lock = threading.Lock()
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+        self.thread = threading.Thread(target=self._run, name='DBWriter', daemon=True)
+        self.thread.start()
+
+    def submit(self, db_path, sql, params):
+        """Queue one statement. Never blocks; counts a drop if the queue is full."""
+        try:
+            self.queue.put_nowait((db_path, sql, params))
+        except queue.Full:
+            with self.lock:
+                self.rows_dropped += 1
+
+    def _connect(self, db_path):
+        conn = self.connections.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.connections[db_path] = conn
+        return conn
+
+    def _flush(self, pending):
+        t0 = time.perf_counter()
+        written = failed = 0
+
+        # one transaction per database; consecutive identical statements share an executemany
+        pending.sort(key=lambda item: item[0])
+        for db_path, items in groupby(pending, key=lambda item: item[0]):
+            items = list(items)
+            try:
+                conn = self._connect(db_path)
+                with conn:
+                    for sql, group in groupby(items, key=lambda item: item[1]):
+                        conn.executemany(sql, [params for _, _, params in group])
+                written += len(items)
+            except sqlite3.Error as e:
+                print(f"⚠️ DB flush to {db_path} failed:", e)
+                failed += len(items)
+
+        flush_ms = (time.perf_counter() - t0) * 1000.0
+        FLUSH_MS.observe(flush_ms)
+        with self.lock:
+            self.rows_written += written
+            self.rows_failed += failed
+            self.flushes += 1
+            self.last_flush_ms = flush_ms
+            self.max_flush_ms = max(self.max_flush_ms, flush_ms)
+
+    def _run(self):
+        pending = []
+        last_flush = time.monotonic()
+        stopping = False
+
+        while not stopping:
+            wait = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self.queue.get(timeout=wait if pending else None)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                if not pending:
+                    last_flush = time.monotonic()  # interval counts from the first queued row
+                pending.append(item)
+
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if pending and (stopping or len(pending) >= self.batch_size or due):
+                self._flush(pending)
+                pending = []
+                last_flush = time.monotonic()
+
+        for conn in self.connections.values():
+            conn.close()
+        self.connections.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'queue_depth': self.queue.qsize(),
+                'rows_written': self.rows_written,
+                'rows_failed': self.rows_failed,
+                'rows_dropped': self.rows_dropped,
+                'flushes': self.flushes,
+                'last_flush_ms': self.last_flush_ms,
+                'max_flush_ms': self.max_flush_ms,
+            }
+
+    def close(self):
+        """Flush everything still queued and close the connections."""
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+
+# -------------------
+# Colors for boxes
+# -------------------
+bbox_colors = [(164,120,87), (68,148,228), (93,97,209), (178,182,133), (88,159,106),
+              (96,202,231), (159,124,168), (169,162,241), (98,118,150), (172,176,184)]
+
+
+def _to_numpy(values):
+    # Ultralytics gives torch tensors (maybe on GPU); plain arrays pass straight through
+    if hasattr(values, 'cpu'):
+        values = values.cpu()
+    if hasattr(values, 'numpy'):
+        values = values.numpy()
+    return np.asarray(values)
+
+
+# -------------------
+# Vectorized post-processing
+# -------------------
+def boxes_to_arrays(boxes, scale=(1.0, 1.0), offset=(0, 0)):
+    """Convert a whole Ultralytics Boxes object to NumPy in one go.
+
+    Returns (xyxy, cls, conf) with shapes (N, 4) int, (N,) int and (N,) float.
+    One device->host copy per field per frame instead of one per box.
+    Boxes are mapped x * scale + offset (per axis) before rounding, for when
+    the model saw a resized crop of the frame.
+    """
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 4), dtype=int), np.empty(0, dtype=int), np.empty(0, dtype=float)
+
+    xyxy = _to_numpy(boxes.xyxy).reshape(-1, 4)
+    if scale != (1.0, 1.0) or offset != (0, 0):
+        (sx, sy), (ox, oy) = scale, offset
+        xyxy = xyxy * np.array([sx, sy, sx, sy]) + np.array([ox, oy, ox, oy])
+    xyxy = xyxy.astype(int)
+    cls = _to_numpy(boxes.cls).reshape(-1).astype(int)
+    conf = _to_numpy(boxes.conf).reshape(-1).astype(float)
+    return xyxy, cls, conf
+
+
+def filter_detections(xyxy, cls, conf, min_conf, classes=None):
+    """Keep boxes with conf >= min_conf (and class in classes, if given)."""
+    keep = conf >= min_conf
+    if classes is not None:
+        keep &= np.isin(cls, list(classes))
+    return xyxy[keep], cls[keep], conf[keep]
+
+
+def extract_detections(result, min_conf, classes=None, scale=(1.0, 1.0), offset=(0, 0)):
+    """Boxes -> filtered (xyxy, cls, conf) arrays for one Ultralytics result (in frame coordinates)."""
+    boxes = getattr(result, 'boxes', None) if result is not None else None
+    return filter_detections(*boxes_to_arrays(boxes, scale, offset), min_conf, classes)
+
+
+def draw_detections(frame, xyxy, cls, conf, labels):
+    """Draw boxes and "name: NN%" labels in place."""
+    for (xmin, ymin, xmax, ymax), classidx, score in zip(xyxy.tolist(), cls.tolist(), conf.tolist()):
+        classname = labels[classidx] if classidx in labels else str(classidx)
+        color = bbox_colors[classidx % len(bbox_colors)]
+        cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, 2)
+        label = f'{classname}: {int(score*100)}%'
+        labelSize, baseLine = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        label_ymin = max(ymin, labelSize[1] + 10)
+        cv2.rectangle(frame, (xmin, label_ymin - labelSize[1] - 10), (xmin + labelSize[0], label_ymin + baseLine - 10), color, cv2.FILLED)
+        cv2.putText(frame, label, (xmin, label_ymin - 7), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+    return frame
@@ -0,0 +1,134 @@
+import sqlite3
+import time
+
+
+HISTORY_DB = "history.db"
+
+# rollup bucket sizes in seconds (buckets start on local-time boundaries, see bucket_start)
+RESOLUTIONS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+# -------------------
+# Schema
+# -------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_raw (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    area TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    people_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_raw_area_ts ON history_raw (area, ts);
+
+CREATE TABLE IF NOT EXISTS history_rollup (
+    area TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    min_count INTEGER NOT NULL,
+    max_count INTEGER NOT NULL,
+    PRIMARY KEY (area, resolution, bucket)
+) WITHOUT ROWID;
+"""
+
+INSERT_RAW_SQL = """
+    INSERT INTO history_raw (area, ts, people_count)
+    VALUES (?, ?, ?)
+"""
+
+# one sample folded into a rollup bucket; avg is total / samples when read
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO history_rollup (area, resolution, bucket, samples, total, min_count, max_count)
+    VALUES (?, ?, ?, 1, ?, ?, ?)
+    ON CONFLICT(area, resolution, bucket) DO UPDATE SET
+        samples = samples + 1,
+        total = total + excluded.total,
+        min_count = min(min_count, excluded.min_count),
+        max_count = max(max_count, excluded.max_count)
+"""
+
+
+def init_history(db_path=HISTORY_DB):
+    """Create the history tables if they don't exist yet."""
+    conn = sqlite3.connect(db_path)
+    try:
+        # only takes effect on a new file; lets retention.py free pages in small steps
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def bucket_start(timestamp, seconds):
+    """Start of the `seconds`-long bucket holding `timestamp`.
+
+    Aligned to this machine's local UTC offset at that time, so day buckets
+    run from local midnight (and hour buckets from :00 in +05:45 style zones).
+    """
+    offset = time.localtime(timestamp).tm_gmtoff
+    return timestamp - (timestamp + offset) % seconds
+
+
+# -------------------
+# Writing
+# -------------------
+def record_statements(area, timestamp, people_count):
+    """(sql, params) pairs that store one sample and update every rollup.
+
+    Returned instead of executed so callers can queue them (see DBWriter).
+    """
+    timestamp = int(timestamp)
+    statements = [(INSERT_RAW_SQL, (area, timestamp, people_count))]
+    for resolution, seconds in RESOLUTIONS.items():
+        bucket = bucket_start(timestamp, seconds)
+        statements.append((UPSERT_ROLLUP_SQL,
+                           (area, resolution, bucket, people_count, people_count, people_count)))
+    return statements
+
+
+def record(conn, area, timestamp, people_count):
+    """Store one sample right away on an open connection (caller commits)."""
+    for sql, params in record_statements(area, timestamp, people_count):
+        conn.execute(sql, params)
+
+
+# -------------------
+# Reading
+# -------------------
+def pick_resolution(start, end):
+    """Coarsest-needed resolution so a range returns at most a few hundred points."""
+    span = end - start
+    if span <= 6 * 3600:
+        return "minute"
+    if span <= 14 * 86400:
+        return "hour"
+    return "day"
+
+
+def query_history(conn, area, start, end, resolution):
+    """Rollup buckets for `area` with start <= bucket < end, oldest first."""
+    seconds = RESOLUTIONS[resolution]
+    rows = conn.execute("""
+        SELECT bucket, samples, total, min_count, max_count
+        FROM history_rollup
+        WHERE area = ? AND resolution = ? AND bucket >= ? AND bucket < ?
+        ORDER BY bucket
+    """, (area, resolution, bucket_start(start, seconds), end)).fetchall()
+
+    return [
+        {
+            "time": bucket,
+            "min": min_count,
+            "avg": round(total / samples, 2),
+            "max": max_count,
+            "samples": samples,
+        }
+        for bucket, samples, total, min_count, max_count in rows
+    ]
@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+
+# -------------------
+# Model input resize (one reusable buffer)
+# -------------------
+class FrameScaler:
+    """Resizes what the model sees into one preallocated buffer.
+
+    The long side becomes imgsz and the aspect ratio is kept, which is the
+    resize Ultralytics' letterbox would do itself, so it only pads. The
+    display/record frame is not touched. Boxes come back in buffer pixels;
+    `scale` maps them to the frame (see extract_detections).
+
+    The buffer is overwritten on every call, so use the result before the
+    next resize().
+    """
+
+    def __init__(self, imgsz=640):
+        self.imgsz = imgsz
+        self.buffer = None
+        self.key = None  # (frame h, frame w, imgsz) the buffer was made for
+        self.size = None  # (w, h) of the buffer
+        self.scale = (1.0, 1.0)  # frame pixels per buffer pixel (x, y)
+
+    def _prepare(self, frame):
+        h, w = frame.shape[:2]
+        r = self.imgsz / max(h, w)
+        bw, bh = max(1, round(w * r)), max(1, round(h * r))
+        self.key = (h, w, self.imgsz)
+        self.size = (bw, bh)
+        self.scale = (w / bw, h / bh)
+        self.buffer = np.empty((bh, bw) + frame.shape[2:], dtype=frame.dtype) if (bw, bh) != (w, h) else None
+
+    def resize(self, frame):
+        if self.key != (frame.shape[0], frame.shape[1], self.imgsz):
+            self._prepare(frame)
+        if self.buffer is None:
+            return frame  # already the right size
+        cv2.resize(frame, self.size, dst=self.buffer, interpolation=cv2.INTER_LINEAR)
+        return self.buffer
+
+
+# -------------------
+# Adaptive imgsz
+# -------------------
+class ImgszController:
+    """Lowers/raises the model input size to keep inferred frames near target_fps.
+
+    Frame times given to update() should leave out waiting for the camera,
+    otherwise a camera slower than target_fps drives imgsz to the minimum for
+    nothing. Every `window` inferred frames the median frame time is compared with the
+    target: too slow => one size step down; fast enough that the next size up
+    would still make target_fps * (1 + margin) (inference cost grows with
+    imgsz squared) => one step up. The first `settle` frames after a change
+    are not counted, the first run at a new size is slower.
+
+    Only for PyTorch models: exported ONNX/OpenVINO models are built for one size.
+    """
+
+    def __init__(self, target_fps, max_imgsz=640, min_imgsz=320, step=64, window=30, margin=0.1, settle=3):
+        self.target_fps = float(target_fps)
+        self.sizes = sorted({max(32, s) for s in range(max_imgsz, min_imgsz - 1, -step)} | {max_imgsz})
+        self.index = len(self.sizes) - 1
+        self.window = window
+        self.margin = margin
+        self.settle = settle
+        self.samples = []
+        self.skip = settle
+        self.last_fps = 0.0
+        self.changes = 0
+
+    @property
+    def imgsz(self):
+        return self.sizes[self.index]
+
+    def update(self, frame_seconds):
+        """Add one inferred frame's time. Returns the new imgsz when it changes, else None."""
+        if self.skip > 0:
+            self.skip -= 1
+            return None
+        self.samples.append(frame_seconds)
+        if len(self.samples) < self.window:
+            return None
+
+        self.last_fps = 1.0 / max(float(np.median(self.samples)), 1e-6)
+        self.samples = []
+        index = self.index
+        if self.last_fps < self.target_fps and index > 0:
+            index -= 1
+        elif index < len(self.sizes) - 1:
+            predicted = self.last_fps * (self.sizes[index] / self.sizes[index + 1]) ** 2
+            if predicted >= self.target_fps * (1 + self.margin):
+                index += 1
+        if index == self.index:
+            return None
+        self.index = index
+        self.skip = self.settle
+        self.changes += 1
+        return self.imgsz
@@ -1,35 +1,18 @@
-import sqlite3
 import os
 
-areas = [
-    ("auditorium", "Auditorium"),
-    ("canteen", "Canteen"),
-    ("computer_lab", "Computer Lab"),
-    ("hod_room", "HOD Room"),
-    ("library", "Library"),
-    ("sports_complex", "Sports Complex")
-]
+from history import HISTORY_DB, init_history
 
-for shortname, pretty in areas:
-    db_filename = f"{shortname}.db"   # e.g., auditorium.db
+# Detection history for every area now lives in one indexed store (history.db),
+# keyed by (area, time), with minute/hour/day rollups kept up to date as data
+# arrives. This replaces the old per-area auditorium.db, library.db, ... files.
 
-    if os.path.exists(db_filename):
-        print(f"⚠️ Existing database '{db_filename}' found. Deleting it...")
-        os.remove(db_filename)
-    else:
-        print("✅ No existing database found. Creating a new one...")
+if os.path.exists(HISTORY_DB):
+    print(f"⚠️ Existing database '{HISTORY_DB}' found. Deleting it...")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(HISTORY_DB + suffix):
+            os.remove(HISTORY_DB + suffix)
+else:
+    print("✅ No existing database found. Creating a new one...")
 
-    # create file + table
-    conn = sqlite3.connect(db_filename)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            people_count INTEGER,
-            status TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-    print(f"Initialized {db_filename}")
\ No newline at end of file
+init_history(HISTORY_DB)
+print(f"Initialized {HISTORY_DB}")
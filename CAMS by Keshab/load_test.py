@@ -0,0 +1,174 @@
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+import requests
+
+
+# -------------------
+# HTTP load generator: N cameras posting, M dashboards polling, K dashboards on /areas/stream
+# -------------------
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ms = np.array(samples) * 1000.0
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def run_load(url, cameras, viewers, seconds, post_interval=1.0, poll_interval=1.0, timeout=10.0,
+             sse_viewers=0):
+    """Each camera POSTs /update_status every post_interval seconds (0 => as fast as it can),
+    each viewer GETs /areas every poll_interval seconds with If-None-Match like a browser.
+    Each SSE viewer holds /areas/stream open like the dashboard, and polls like a viewer if refused (503)."""
+    url = url.rstrip("/")
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = {"update_status": [], "areas": [], "areas_stream": []}
+    errors = {"update_status": 0, "areas": 0, "areas_stream": 0}
+    not_modified = [0]
+    sse = {"connected": 0, "rejected": 0, "events": 0}
+
+    def record(kind, started, ok):
+        with lock:
+            latencies[kind].append(time.perf_counter() - started)
+            if not ok:
+                errors[kind] += 1
+
+    def camera(idx):
+        session = requests.Session()
+        n = 0
+        while not stop.is_set():
+            n += 1
+            t0 = time.perf_counter()
+            try:
+                r = session.post(f"{url}/update_status", timeout=timeout, json={
+                    "area": f"Load camera {idx}", "people_count": n % 40, "timestamp": int(time.time())})
+                ok = r.status_code == 200
+            except requests.RequestException:
+                ok = False
+            record("update_status", t0, ok)
+            stop.wait(post_interval)
+
+    def viewer():
+        session = requests.Session()
+        etag = None
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                r = session.get(f"{url}/areas", timeout=timeout,
+                                headers={"If-None-Match": etag} if etag else {})
+                ok = r.status_code in (200, 304)
+                if r.status_code == 304:
+                    with lock:
+                        not_modified[0] += 1
+                elif ok:
+                    etag = r.headers.get("ETag")
+            except requests.RequestException:
+                ok = False
+            record("areas", t0, ok)
+            stop.wait(poll_interval)
+
+    def sse_viewer():
+        # latency = time until the stream's response headers arrive
+        t0 = time.perf_counter()
+        try:
+            r = requests.get(f"{url}/areas/stream", stream=True, timeout=(timeout, None))
+        except requests.RequestException:
+            record("areas_stream", t0, False)
+            return
+        if r.status_code != 200:
+            r.close()
+            refused = r.status_code == 503
+            record("areas_stream", t0, refused)
+            if refused:
+                with lock:
+                    sse["rejected"] += 1
+                viewer()  # what the dashboard does then
+            return
+        record("areas_stream", t0, True)
+        with lock:
+            sse["connected"] += 1
+        try:
+            for line in r.iter_lines():
+                if stop.is_set():
+                    break
+                if line.startswith(b"event: areas"):
+                    with lock:
+                        sse["events"] += 1
+        except requests.RequestException:
+            record("areas_stream", t0, False)
+        finally:
+            r.close()
+
+    threads = [threading.Thread(target=camera, args=(i,), daemon=True) for i in range(cameras)]
+    threads += [threading.Thread(target=viewer, daemon=True) for _ in range(viewers)]
+    # not joined: a reader blocked on a quiet stream only sees `stop` at the next event/keep-alive
+    sse_threads = [threading.Thread(target=sse_viewer, daemon=True) for _ in range(sse_viewers)]
+    started = time.perf_counter()
+    for t in threads + sse_threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join(timeout + 1)
+    elapsed = time.perf_counter() - started
+
+    report = {"url": url, "cameras": cameras, "viewers": viewers, "sse_viewers": sse_viewers,
+              "seconds": round(elapsed, 2)}
+    total = 0
+    for kind, samples in latencies.items():
+        report[kind] = percentiles(samples)
+        report[kind]["errors"] = errors[kind]
+        report[kind]["per_second"] = round(len(samples) / elapsed, 1)
+        total += len(samples)
+    report["areas"]["not_modified"] = not_modified[0]
+    report["areas_stream"].update(sse)
+    report["requests_per_second"] = round(total / elapsed, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate N cameras posting and M dashboards polling a running CAMS server.')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to test (default: http://127.0.0.1:8000)')
+    parser.add_argument('--cameras', type=int, default=20, help='Simulated detectors posting /update_status (default: 20)')
+    parser.add_argument('--viewers', type=int, default=100, help='Simulated dashboards polling /areas (default: 100)')
+    parser.add_argument('--sse-viewers', type=int, default=0,
+                        help='Simulated dashboards on /areas/stream, polling if refused (default: 0)')
+    parser.add_argument('--seconds', type=float, default=30.0, help='Test duration (default: 30)')
+    parser.add_argument('--post-interval', type=float, default=1.0, help='Seconds between posts per camera, 0 => flat out')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls per viewer, 0 => flat out')
+    parser.add_argument('--json', help='Also write the report to this file', default=None)
+    args = parser.parse_args()
+
+    print(f"⏱️ {args.cameras} cameras + {args.viewers} viewers + {args.sse_viewers} live viewers "
+          f"against {args.url} for {args.seconds:.0f} s...")
+    report = run_load(args.url, args.cameras, args.viewers, args.seconds, args.post_interval, args.poll_interval,
+                      sse_viewers=args.sse_viewers)
+
+    print(f"🏁 {report['requests_per_second']} requests/s overall")
+    for kind in ("update_status", "areas", "areas_stream"):
+        r = report[kind]
+        if r["count"]:
+            print(f"   {kind:14s} {r['per_second']:8.1f}/s  p50 {r['p50_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms  "
+                  f"p99 {r['p99_ms']:7.2f} ms  errors {r['errors']}")
+    print(f"   /areas answered 304 Not Modified: {report['areas']['not_modified']}")
+    if args.sse_viewers:
+        r = report["areas_stream"]
+        print(f"   /areas/stream: {r['connected']} connected, {r['rejected']} refused (polled instead), "
+              f"{r['events']} events received")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# milliseconds; covers a fast DB flush up to a slow CPU inference
+DEFAULT_MS_BUCKETS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# -------------------
+# Metric types (Prometheus text format, no dependencies)
+# -------------------
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.children = {}
+        if not self.label_names:
+            self.children[()] = self._new_child()  # unlabeled metrics show 0 before their first update
+
+    def labels(self, *values):
+        """Child for one label combination; keep it around on hot paths instead of calling this per frame."""
+        values = tuple(str(v) for v in values)
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            children = list(self.children.items())
+        for values, child in children:
+            lines += self._render_child(values, child)
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self, lock):
+        self.value = 0.0
+        self.lock = lock
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value(self.lock)
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_label_text(self.label_names, values)} {child.value:g}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self._default().set(value)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count", "lock")
+
+    def __init__(self, bounds, lock):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = lock
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_MS_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help_text, labels)
+
+    def _new_child(self):
+        return _Buckets(self.bounds, self.lock)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def _render_child(self, values, child):
+        with self.lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines, cumulative = [], 0
+        for bound, n in zip(self.bounds + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f"{self.name}_bucket{_label_text(self.label_names, values, [('le', le)])} {cumulative}")
+        labels = _label_text(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {total:g}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class FunctionMetric(_Metric):
+    """Value read from a callback at scrape time, so the hot path pays nothing.
+
+    fn() returns a number, or {label value tuple: number} when labels are given.
+    """
+
+    def __init__(self, name, help_text, fn, kind="gauge", labels=()):
+        self.fn = fn
+        self.kind = kind
+        super().__init__(name, help_text, labels)
+
+    def _new_child(self):
+        return None  # nothing stored, fn() is the value
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []  # the thing being watched is gone/closed; skip it this scrape
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for values, v in items:
+            values = values if isinstance(values, tuple) else (values,)
+            lines.append(f"{self.name}{_label_text(self.label_names, values)} {float(v):g}")
+        return lines
+
+
+# -------------------
+# Registry + exposition
+# -------------------
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            # re-registering (e.g. a module imported twice) returns the existing metric
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_MS_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def function(self, name, help_text, fn, kind="gauge", labels=()):
+        """Register (or replace) a scrape-time callback metric."""
+        metric = FunctionMetric(name, help_text, fn, kind, labels)
+        with self.lock:
+            self.metrics[name] = metric
+        return metric
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def detector_metrics(registry=REGISTRY):
+    """(stage_ms, frames_inferred) used by both yolo_library and multi_camera.
+
+    Registered on first call, so only detector processes export them (not the web app).
+    """
+    return (registry.histogram("cams_stage_ms", "Detector time per frame by pipeline stage", labels=("stage",)),
+            registry.counter("cams_frames_inferred_total", "Frames sent through the model"))
+
+
+def register_stats(prefix, sources, counters=(), gauges=(), label=None, registry=REGISTRY):
+    """Expose fields of an existing .stats() dict as scrape-time metrics.
+
+    sources is one object with a stats() method, or (with `label`) a
+    {label value: object} dict that is read at scrape time, so entries added
+    or removed later show up. counters become <prefix>_<field>_total.
+    """
+    def reader(field):
+        if label is None:
+            return lambda: sources.stats()[field]
+        return lambda: {(name,): source.stats()[field] for name, source in list(sources.items())}
+
+    labels = (label,) if label else ()
+    for field in counters:
+        registry.function(f"{prefix}_{field}_total", f"{field.replace('_', ' ')} ({prefix})",
+                          reader(field), kind="counter", labels=labels)
+    for field in gauges:
+        registry.function(f"{prefix}_{field}", f"{field.replace('_', ' ')} ({prefix})",
+                          reader(field), kind="gauge", labels=labels)
+
+
+def serve_metrics(port, registry=REGISTRY, host="127.0.0.1"):
+    """Serve GET /metrics on a daemon thread (for processes without a web app, like the detector).
+
+    Local only by default; pass host="0.0.0.0" to let another machine scrape it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    return server
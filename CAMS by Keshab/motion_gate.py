@@ -0,0 +1,75 @@
+import time
+
+import cv2
+
+
+# -------------------
+# Motion-gated inference
+# -------------------
+class MotionGate:
+    """Decides per frame whether the scene changed enough to run YOLO again.
+
+    The frame is shrunk to `width` pixels wide, grayscaled and blurred, then
+    compared with the same thumbnail of the last frame that went through the
+    model. If more than `threshold` of the pixels moved by `pixel_delta` grey
+    levels, we infer; otherwise the caller reuses the last count. A frame is
+    always inferred at least every `max_staleness` seconds.
+    """
+
+    def __init__(self, threshold=0.01, pixel_delta=25, max_staleness=5.0, width=160):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.max_staleness = max_staleness
+        self.width = width
+
+        self.reference = None
+        self.last_inference = 0.0
+
+        self.frames_checked = 0
+        self.frames_inferred = 0
+        self.gate_ms = 0.0
+        self.inference_ms = 0.0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, int(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def should_infer(self, frame, now=None):
+        t0 = time.perf_counter()
+        now = time.monotonic() if now is None else now
+        self.frames_checked += 1
+
+        thumb = self._thumbnail(frame)
+        run = (self.reference is None
+               or self.reference.shape != thumb.shape
+               or now - self.last_inference >= self.max_staleness)
+        if not run:
+            diff = cv2.absdiff(thumb, self.reference)
+            changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1])
+            run = changed >= self.threshold * thumb.size
+
+        if run:
+            # the frame we're about to infer becomes the new reference
+            self.reference = thumb
+            self.last_inference = now
+            self.frames_inferred += 1
+        self.gate_ms += (time.perf_counter() - t0) * 1000.0
+        return run
+
+    def add_inference_time(self, ms):
+        """Report how long the model took, used to estimate the CPU saved."""
+        self.inference_ms += ms
+
+    def stats(self):
+        skipped = self.frames_checked - self.frames_inferred
+        avg_inference_ms = self.inference_ms / self.frames_inferred if self.frames_inferred else 0.0
+        return {
+            'checked': self.frames_checked,
+            'inferred': self.frames_inferred,
+            'skipped': skipped,
+            'infer_ratio': self.frames_inferred / self.frames_checked if self.frames_checked else 1.0,
+            'cpu_saved_ms': max(0.0, skipped * avg_inference_ms - self.gate_ms),
+        }
@@ -0,0 +1,214 @@
+import json
+import time
+
+import cv2
+
+from capture import FrameGrabber, parse_source
+from detections import extract_detections, draw_detections
+from inference_size import FrameScaler
+from metrics import detector_metrics, register_stats
+from zones import ZoneCounter, load_zones
+
+
+STAGE_MS, FRAMES_INFERRED = detector_metrics()
+
+
+# -------------------
+# Camera config
+# -------------------
+def load_camera_config(path):
+    """Read a JSON file mapping area names to sources.
+
+    Example cameras.json:
+        {
+            "Library": "usb0",
+            "Canteen": "http://192.168.1.34:4747/video",
+            "Block A": {
+                "source": "usb1",
+                "zones": {"Computer Lab": [[0, 0], [320, 0], [320, 480], [0, 480]],
+                          "HOD Room": [[330, 0], [640, 0], [640, 480], [330, 480]]}
+            }
+        }
+
+    Returns {area: {"source": str, "zones": dict or None}}. A camera with
+    zones reports one count per zone instead of one for the area.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        cameras = json.load(f)
+
+    if not isinstance(cameras, dict) or not cameras:
+        raise ValueError('camera config must be a JSON object of {"Area name": "source"}')
+
+    config = {}
+    for area, entry in cameras.items():
+        if isinstance(entry, dict):
+            if 'source' not in entry:
+                raise ValueError(f'camera "{area}" has no "source"')
+            zones = load_zones(entry['zones']) if entry.get('zones') else None
+            config[str(area)] = {'source': str(entry['source']), 'zones': zones}
+        else:
+            config[str(area)] = {'source': str(entry), 'zones': None}
+    return config
+
+
+def capture_arg(source):
+    """(source_type, argument for cv2.VideoCapture) for a usb index ("usb0" / "0"), video file or stream URL."""
+    source_type, cap_arg = parse_source(source)
+    if source_type not in ('usb', 'video', 'stream'):
+        raise ValueError(f'{source} is not a usb camera, video file or stream ({source_type})')
+    return source_type, cap_arg
+
+
+def open_capture(source):
+    """Open a usb index ("usb0" / "0"), video file or stream URL with cv2."""
+    source_type, cap_arg = capture_arg(source)
+    cap = cv2.VideoCapture(cap_arg)
+    if not cap.isOpened():
+        raise IOError(f'could not open {source}')
+    return cap, source_type
+
+
+# -------------------
+# Batched inference loop
+# -------------------
+def run_multi_camera(model, cameras, min_conf, on_count, labels=None, classes=None,
+                     resolution=None, buffer_size=2, show=True, imgsz=640, on_offline=None, on_online=None,
+                     reconnect_backoff=1.0, reconnect_max_backoff=30.0):
+    """Run one model over several cameras.
+
+    Each camera gets its own FrameGrabber. Every iteration the freshest frame
+    from each camera is collected and all of them go through the model in a
+    single batched call. on_count(area, count) is called per camera per
+    inference, same as the single-source loop (per zone for cameras with zones,
+    which also only send their zones' bounding box to the model).
+
+    usb/stream cameras that drop are reopened with backoff (reconnect_backoff
+    None => removed like an ended video instead), and on_offline(areas) is
+    called with the areas/zones they report so they can be marked offline
+    (on_online(areas) once their frames flow again).
+    """
+    grabbers = {}
+    zone_counters = {}
+    scalers = {}  # per camera: what the model sees is resized into its own buffer (like the single-source loop)
+    for area, camera in cameras.items():
+        source = camera['source']
+        if camera.get('zones'):
+            zone_counters[area] = ZoneCounter(camera['zones'])
+        try:
+            cap, source_type = open_capture(source)
+        except Exception as e:
+            print(f"WARNING: Skipping {area} ({source}):", e)
+            continue
+        reconnect = {}
+        if reconnect_backoff and source_type in ('usb', 'stream'):
+            cap_arg = capture_arg(source)[1]
+            reported = zone_counters[area].names if area in zone_counters else [area]
+            reconnect = {
+                'reopen': lambda cap_arg=cap_arg: cv2.VideoCapture(cap_arg),
+                'backoff': reconnect_backoff,
+                'max_backoff': reconnect_max_backoff,
+                'on_disconnect': (lambda reported=reported: on_offline(reported)) if on_offline else None,
+                'on_reconnect': (lambda reported=reported: on_online(reported)) if on_online else None,
+            }
+        grabbers[area] = FrameGrabber(cap, source_type, buffer_size=buffer_size, **reconnect).start()
+        scalers[area] = FrameScaler(imgsz)
+        print(f"📷 {area}: {source} ({source_type})")
+
+    if not grabbers:
+        print("ERROR: None of the configured cameras could be opened.")
+        return
+
+    batches = 0
+    frames_inferred = 0
+    t_begin = time.perf_counter()
+    register_stats('cams_frames', grabbers, counters=('captured', 'processed', 'dropped'),
+                   gauges=('buffered',), label='camera')
+    register_stats('cams_camera', grabbers, counters=('disconnects', 'reconnects', 'downtime_seconds'),
+                   gauges=('connected',), label='camera')
+    stage_batch = STAGE_MS.labels('inference_batch')
+
+    try:
+        while grabbers:
+            # Collect the latest frame from every camera that has one ready
+            areas, frames, crops, offsets, scales = [], [], [], [], []
+            for area, grabber in list(grabbers.items()):
+                frame = grabber.read(timeout=0)
+                if frame is None:
+                    if grabber.ended:
+                        print(f"⚠️ {area}: source ended, removing it from the batch.")
+                        grabber.stop()
+                        grabber.cap.release()
+                        del grabbers[area]
+                    continue
+                if resolution:
+                    frame = cv2.resize(frame, resolution)
+                if area in zone_counters:
+                    crop, offset = zone_counters[area].crop(frame)
+                else:
+                    crop, offset = frame, (0, 0)
+                scaler = scalers[area]
+                areas.append(area)
+                frames.append(frame)
+                crops.append(scaler.resize(crop))
+                offsets.append(offset)
+                scales.append(scaler.scale)
+
+            if not frames:
+                time.sleep(0.005)
+                continue
+
+            try:
+                t_infer = time.perf_counter()
+                results = model(crops, imgsz=imgsz, verbose=False)
+                stage_batch.observe((time.perf_counter() - t_infer) * 1000.0)
+            except Exception as e:
+                print("WARNING: batched inference failed:", e)
+                continue
+
+            batches += 1
+            frames_inferred += len(frames)
+            FRAMES_INFERRED.inc(len(frames))
+
+            for area, frame, offset, scale, result in zip(areas, frames, offsets, scales, results):
+                xyxy, cls, conf = extract_detections(result, min_conf, classes, scale=scale, offset=offset)
+
+                zone_counter = zone_counters.get(area)
+                if zone_counter is not None:
+                    zone_idx, zone_counts = zone_counter.assign(xyxy)
+                    inside = zone_idx >= 0
+                    xyxy, cls, conf = xyxy[inside], cls[inside], conf[inside]
+                    for zone_name, zone_count in zone_counts.items():
+                        on_count(zone_name, zone_count)
+                else:
+                    on_count(area, len(conf))
+                object_count = len(conf)
+
+                if show:
+                    if zone_counter is not None:
+                        zone_counter.draw(frame, zone_counts)
+                    draw_detections(frame, xyxy, cls, conf, labels or {})
+                    cv2.putText(frame, f'{area}: {object_count}', (10, 40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0, 255, 255), 2)
+                    cv2.imshow(f'YOLO detection results - {area}', frame)
+
+            if show and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    except KeyboardInterrupt:
+        print("Interrupted by user")
+
+    finally:
+        elapsed = max(time.perf_counter() - t_begin, 1e-6)
+        print(f'Batches: {batches}, frames inferred: {frames_inferred}, '
+              f'total FPS: {frames_inferred / elapsed:.2f}')
+        for area, grabber in grabbers.items():
+            grabber.stop()
+            cap_stats = grabber.stats()
+            print(f"{area}: processed {cap_stats['processed']}, dropped {cap_stats['dropped']}"
+                  + (f", reconnects {cap_stats['reconnects']}, downtime {cap_stats['downtime_seconds']:.1f} s"
+                     if cap_stats['disconnects'] else ""))
+            try:
+                grabber.cap.release()
+            except Exception:
+                pass
+        if show:
+            cv2.destroyAllWindows()
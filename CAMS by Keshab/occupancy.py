@@ -0,0 +1,155 @@
+import sqlite3
+import threading
+import time
+
+
+CAMS_DB = "cams.db"
+
+# (people below this count, status); anything above the last one is "closed".
+# These names are the ones the dashboard styles (static/script.js, style.css).
+STATUS_LEVELS = ((1, "empty"), (10, "open"), (30, "busy"))
+OFFLINE_STATUS = "offline"  # camera disconnected: people_count is the last one seen, not live
+
+UPSERT_SQL = """
+    INSERT INTO area_status (area, people_count, status, updated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(area) DO UPDATE SET
+        people_count = excluded.people_count,
+        status = excluded.status,
+        updated_at = excluded.updated_at
+    WHERE excluded.updated_at >= area_status.updated_at
+"""
+
+
+# -------------------
+# Status classification (detector + web app)
+# -------------------
+def get_status(count):
+    for below, status in STATUS_LEVELS:
+        if count < below:
+            return status
+    return "closed"
+
+
+def upsert_area_status(cursor, area, count, timestamp, status=None):
+    """Insert/update one area. Returns False if a newer row is already stored.
+
+    status defaults to get_status(count); the detector passes OFFLINE_STATUS.
+    """
+    cursor.execute(UPSERT_SQL, (area, count, status or get_status(count), timestamp))
+    return cursor.rowcount > 0
+
+
+# -------------------
+# Coalescing area_status sink
+# -------------------
+class OccupancySink:
+    """Latest people count per area, written to area_status only when it matters.
+
+    update() is cheap enough to call every frame. A row is written when the
+    count or status differs from what was last written, or when `heartbeat`
+    seconds passed without a write (so the dashboard can tell the detector is
+    alive). Changes are coalesced: an area is written at most once per
+    `min_interval` seconds, with whatever count is newest at that point.
+
+    Writes go through `writer` (a DBWriter, shared with the history tables)
+    when given, otherwise through one connection the sink keeps open.
+    """
+
+    def __init__(self, db_path=CAMS_DB, writer=None, heartbeat=60.0, min_interval=2.0):
+        self.db_path = db_path
+        self.writer = writer
+        self.heartbeat = heartbeat
+        self.min_interval = min_interval
+        self.conn = None
+        self.lock = threading.Lock()
+
+        self.written = {}  # area -> (count, status, time written)
+        self.pending = {}  # area -> (count, timestamp) not written yet
+
+        self.updates = 0
+        self.writes = 0
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        return self.conn
+
+    def _write(self, area, count, timestamp, status=None):
+        status = status or get_status(count)
+        params = (area, count, status, int(timestamp))
+        if self.writer is not None:
+            self.writer.submit(self.db_path, UPSERT_SQL, params)
+        else:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.execute(UPSERT_SQL, params)
+            except sqlite3.Error as e:
+                print(f"⚠️ area_status write for {area} failed:", e)
+                return False
+        self.written[area] = (count, status, time.monotonic())
+        self.pending.pop(area, None)
+        self.writes += 1
+        return True
+
+    def update(self, area, count, timestamp=None):
+        """Record the newest count. Returns True if it was written now."""
+        timestamp = time.time() if timestamp is None else timestamp
+        now = time.monotonic()
+        with self.lock:
+            self.updates += 1
+            last = self.written.get(area)
+            if last is not None:
+                last_count, last_status, last_time = last
+                changed = count != last_count or get_status(count) != last_status
+                if not changed:
+                    self.pending.pop(area, None)  # flickered back to what's stored
+                    if now - last_time < self.heartbeat:
+                        return False
+                elif now - last_time < self.min_interval:
+                    self.pending[area] = (count, timestamp)
+                    return False
+            return self._write(area, count, timestamp)
+
+    def mark_offline(self, area, timestamp=None):
+        """Write the area as OFFLINE_STATUS right away, keeping its last count.
+
+        The next update() for the area differs from what is stored, so it is
+        written as a normal status again (after min_interval), or right away
+        by mark_online(). Returns the count that was written.
+        """
+        return self._write_latest(area, timestamp, OFFLINE_STATUS)
+
+    def mark_online(self, area, timestamp=None):
+        """Clear OFFLINE_STATUS right away (camera back), with the last count. Returns it."""
+        return self._write_latest(area, timestamp)
+
+    def _write_latest(self, area, timestamp, status=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            last = self.written.get(area)
+            count = last[0] if last is not None else 0
+            pending = self.pending.get(area)
+            if pending is not None:
+                count = pending[0]
+            self._write(area, count, timestamp, status)
+            return count
+
+    def flush(self):
+        """Write every coalesced change that is still waiting."""
+        with self.lock:
+            for area, (count, timestamp) in list(self.pending.items()):
+                self._write(area, count, timestamp)
+
+    def stats(self):
+        with self.lock:
+            return {'updates': self.updates, 'writes': self.writes, 'pending': len(self.pending)}
+
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
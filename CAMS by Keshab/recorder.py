@@ -0,0 +1,164 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+_STOP = object()
+
+# tried in order; the first one this OpenCV build can write wins
+CODECS = (('avc1', '.mp4'), ('mp4v', '.mp4'), ('XVID', '.avi'), ('MJPG', '.avi'))
+
+
+# -------------------
+# Background video recorder
+# -------------------
+class VideoRecorder:
+    """Writes frames to rotating video files from a background thread.
+
+    write() only puts the frame on a bounded queue (frames are dropped and
+    counted when it is full), so a slow disk never stalls detection. Don't draw
+    on a frame after handing it to write().
+
+    The frame rate of each file is measured from the write() timestamps instead
+    of assumed, so a loop running at 8 FPS records an 8 FPS video that plays
+    back in real time. The first `warmup` seconds (at most max_queue frames,
+    so memory stays bounded) are held back to get that measurement. A new file (prefix_YYYYmmdd_HHMMSS_NNN.ext) is started every
+    `segment_seconds` or once the current one reaches `segment_mb`.
+    """
+
+    def __init__(self, prefix, frame_size, segment_seconds=600, segment_mb=200,
+                 max_queue=64, warmup=2.0, default_fps=30.0, codecs=CODECS):
+        self.prefix = prefix
+        self.frame_size = frame_size
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_mb * 1024 * 1024 if segment_mb else None
+        self.warmup = warmup
+        self.default_fps = default_fps
+        self.codecs = codecs
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.timestamps = deque(maxlen=120)
+        self.pending = []  # frames held until the frame rate is known
+        self.max_pending = max_queue
+        self.writer = None
+        self.codec = None
+        self.segment_path = None
+        self.segment_start = 0.0
+        self.segment_frames = 0
+        self.lock = threading.Lock()
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.segments = []
+
+        self.thread = threading.Thread(target=self._run, name='VideoRecorder', daemon=True)
+        self.thread.start()
+
+    def write(self, frame):
+        """Queue one frame. Never blocks."""
+        try:
+            self.queue.put_nowait((frame, time.monotonic()))
+        except queue.Full:
+            with self.lock:
+                self.frames_dropped += 1
+
+    def measured_fps(self):
+        if len(self.timestamps) < 2 or self.timestamps[-1] <= self.timestamps[0]:
+            return self.default_fps
+        fps = (len(self.timestamps) - 1) / (self.timestamps[-1] - self.timestamps[0])
+        return min(max(fps, 1.0), 60.0)
+
+    def _open_segment(self, ts):
+        name = f"{self.prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{len(self.segments) + 1:03d}"
+        fps = self.measured_fps()
+        codecs = [self.codec] if self.codec else self.codecs
+        for fourcc, ext in codecs:
+            path = name + ext
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, self.frame_size)
+            if writer.isOpened():
+                self.writer, self.codec, self.segment_path = writer, (fourcc, ext), path
+                self.segment_start, self.segment_frames = ts, 0
+                with self.lock:
+                    self.segments.append(path)
+                print(f"🎥 Recording to {path} ({fourcc}, {fps:.1f} FPS)")
+                return True
+            writer.release()
+        print("⚠️ Recorder: no working video codec, recording disabled")
+        return False
+
+    def _close_segment(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+    def _segment_full(self, ts):
+        if self.segment_seconds and ts - self.segment_start >= self.segment_seconds:
+            return True
+        # a stat() every 30 frames is plenty to catch the size limit
+        if self.segment_bytes and self.segment_frames % 30 == 0:
+            try:
+                return os.path.getsize(self.segment_path) >= self.segment_bytes
+            except OSError:
+                return False
+        return False
+
+    def _write(self, frame, ts):
+        if self.writer is not None and self._segment_full(ts):
+            self._close_segment()
+        if self.writer is None and not self._open_segment(ts):
+            return False
+        self.writer.write(frame)
+        self.segment_frames += 1
+        with self.lock:
+            self.frames_written += 1
+        return True
+
+    def _run(self):
+        recording = True
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            if not recording:
+                continue
+            frame, ts = item
+            self.timestamps.append(ts)
+            if (self.codec is None and ts - self.timestamps[0] < self.warmup
+                    and len(self.pending) < self.max_pending):
+                self.pending.append((frame, ts))
+                continue
+            try:
+                for held, held_ts in self.pending:
+                    self._write(held, held_ts)
+                self.pending = []
+                recording = self._write(frame, ts)
+            except cv2.error as e:
+                print("⚠️ Recorder write failed:", e)
+
+        try:
+            for held, held_ts in self.pending:
+                if not self._write(held, held_ts):
+                    break
+        except cv2.error as e:
+            print("⚠️ Recorder write failed:", e)
+        self.pending = []
+        self._close_segment()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'frames_written': self.frames_written,
+                'frames_dropped': self.frames_dropped,
+                'queue_depth': self.queue.qsize(),
+                'fps': self.measured_fps(),
+                'segments': list(self.segments),
+            }
+
+    def close(self):
+        """Write out everything queued and close the current file."""
+        self.queue.put(_STOP)
+        self.thread.join(timeout=30.0)
@@ -0,0 +1,152 @@
+import argparse
+import sqlite3
+import time
+
+from history import HISTORY_DB
+
+
+# days to keep per table/resolution (None => keep forever)
+DEFAULT_POLICIES = {
+    "raw": 7,
+    "minute": 90,
+    "hour": 730,
+    "day": None,
+}
+
+CHUNK_SIZE = 5000  # rows per DELETE transaction
+CHUNK_PAUSE = 0.05  # seconds between chunks so the detector's writer gets the lock
+VACUUM_PAGES = 2000  # pages returned to the OS per incremental_vacuum step
+
+
+# -------------------
+# Chunked deletes
+# -------------------
+def _delete_in_chunks(conn, sql, params, chunk_size, pause):
+    deleted = 0
+    while True:
+        with conn:
+            cur = conn.execute(sql, params + (chunk_size,))
+        deleted += cur.rowcount
+        if cur.rowcount < chunk_size:
+            return deleted
+        time.sleep(pause)
+
+
+def purge_raw(conn, cutoff, chunk_size=CHUNK_SIZE, pause=CHUNK_PAUSE):
+    # rows are appended in time order, so walking ids from the start finds the
+    # old ones first without needing an index on ts alone
+    return _delete_in_chunks(conn, """
+        DELETE FROM history_raw WHERE id IN (
+            SELECT id FROM history_raw WHERE ts < ? ORDER BY id LIMIT ?
+        )
+    """, (cutoff,), chunk_size, pause)
+
+
+def purge_rollups(conn, resolution, cutoff, chunk_size=CHUNK_SIZE, pause=CHUNK_PAUSE):
+    deleted = 0
+    areas = [row[0] for row in conn.execute("SELECT DISTINCT area FROM history_rollup")]
+    for area in areas:
+        # (area, resolution, bucket) is the primary key -> index range delete
+        deleted += _delete_in_chunks(conn, """
+            DELETE FROM history_rollup WHERE area = ? AND resolution = ? AND bucket IN (
+                SELECT bucket FROM history_rollup
+                WHERE area = ? AND resolution = ? AND bucket < ?
+                ORDER BY bucket LIMIT ?
+            )
+        """, (area, resolution, area, resolution, cutoff), chunk_size, pause)
+    return deleted
+
+
+# -------------------
+# Space reclaim
+# -------------------
+def reclaim_space(conn, full_vacuum=False):
+    """Give free pages back to the OS. Returns the number of pages freed.
+
+    With auto_vacuum=INCREMENTAL (new history.db files) this runs small
+    incremental_vacuum steps. Older files need one full VACUUM (full_vacuum=True),
+    which also switches them to incremental mode for next time.
+    """
+    before = conn.execute("PRAGMA page_count").fetchone()[0]
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    if full_vacuum:
+        if mode != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    elif mode == 2:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        while free > 0:
+            # executescript steps the pragma to completion (execute() frees one page)
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES});")
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free:
+                break
+            free = remaining
+            time.sleep(CHUNK_PAUSE)
+
+    after = conn.execute("PRAGMA page_count").fetchone()[0]
+    return max(0, before - after)
+
+
+def run_retention(db_path=HISTORY_DB, policies=None, now=None, full_vacuum=False,
+                  chunk_size=CHUNK_SIZE):
+    """Apply the retention policies once and return a report dict."""
+    policies = DEFAULT_POLICIES if policies is None else policies
+    now = int(time.time() if now is None else now)
+    report = {"deleted": {}, "pages_freed": 0, "seconds": 0.0}
+    t0 = time.perf_counter()
+
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    try:
+        conn.execute("PRAGMA busy_timeout=30000")
+        for name, days in policies.items():
+            if days is None:
+                continue
+            cutoff = now - int(days * 86400)
+            if name == "raw":
+                report["deleted"][name] = purge_raw(conn, cutoff, chunk_size)
+            else:
+                report["deleted"][name] = purge_rollups(conn, name, cutoff, chunk_size)
+        report["pages_freed"] = reclaim_space(conn, full_vacuum)
+    finally:
+        conn.close()
+
+    report["seconds"] = round(time.perf_counter() - t0, 3)
+    return report
+
+
+# -------------------
+# CLI
+#   python retention.py                 (run once with the defaults)
+#   python retention.py --every 3600    (keep running every hour)
+# -------------------
+def main():
+    parser = argparse.ArgumentParser(description='Delete old detection history and reclaim disk space.')
+    parser.add_argument('--db', help='History database (default: "history.db")', default=HISTORY_DB)
+    for name, days in DEFAULT_POLICIES.items():
+        parser.add_argument(f'--{name}-days', type=float, default=days,
+                            help=f'Days of {name} rows to keep, 0 => keep forever (default: {days or "forever"})')
+    parser.add_argument('--vacuum', help='Run a full VACUUM after deleting (locks the DB while it runs)',
+                        action='store_true')
+    parser.add_argument('--every', type=float, default=None,
+                        help='Repeat every N seconds instead of running once')
+    args = parser.parse_args()
+
+    policies = {}
+    for name in DEFAULT_POLICIES:
+        days = getattr(args, f'{name}_days')
+        policies[name] = days if days else None
+
+    while True:
+        report = run_retention(args.db, policies, full_vacuum=args.vacuum)
+        deleted = ", ".join(f"{name}={count}" for name, count in report["deleted"].items())
+        print(f"🧹 Retention: deleted {deleted or 'nothing'}; "
+              f"freed {report['pages_freed']} pages in {report['seconds']} s")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import os
+import sys
+
+import app as cams_app
+
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8000
+DEFAULT_THREADS = 16  # each open /areas/stream (live dashboard) holds one thread
+MIN_FREE_THREADS = 2  # threads (at least, or a quarter of --threads) never given to /areas/stream
+
+
+# -------------------
+# Production servers
+# -------------------
+def serve_waitress(host, port, threads):
+    # pure Python, works on Windows; one process, `threads` request threads
+    from waitress import serve
+    serve(cams_app.app, host=host, port=port, threads=threads,
+          connection_limit=max(100, threads * 8), channel_timeout=120)
+
+
+def serve_gunicorn(host, port, workers, threads):
+    # Linux/macOS only; `workers` processes x `threads` threads each
+    from gunicorn.app.base import BaseApplication
+
+    class CamsApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("timeout", 120)
+            self.cfg.set("accesslog", None)
+
+        def load(self):
+            return cams_app.app
+
+    CamsApplication().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the CAMS dashboard/API with a production WSGI server.')
+    parser.add_argument('--server', choices=['auto', 'waitress', 'gunicorn'], default='auto',
+                        help='auto => gunicorn on Linux/macOS if installed, otherwise waitress')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes (gunicorn only, default: 1). See the note on multiple workers below.')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help=f'Request threads per process (default: {DEFAULT_THREADS})')
+    args = parser.parse_args()
+
+    server = args.server
+    if server == 'auto':
+        server = 'waitress'
+        if sys.platform != 'win32':
+            try:
+                import gunicorn  # noqa: F401
+                server = 'gunicorn'
+            except ImportError:
+                pass
+
+    if args.workers > 1:
+        if server != 'gunicorn':
+            print('⚠️ --workers needs gunicorn (waitress runs one process); using 1 worker')
+            args.workers = 1
+        else:
+            # the /areas cache and the live-update broadcaster live in each process
+            print('⚠️ With several workers, /areas/stream clients only get pushes for updates '
+                  'posted to their own worker, and other workers pick changes up after '
+                  f'AREA_CACHE_TTL ({cams_app.AREA_CACHE_TTL} s). Prefer more --threads.')
+
+    # live dashboards beyond this get a 503 and poll /areas instead of starving the API
+    sse_clients = max(0, args.threads - max(MIN_FREE_THREADS, args.threads // 4))
+    cams_app.broadcaster.max_subscribers = sse_clients
+
+    cams_app.init_databases()
+    # don't hand the parent's SQLite connections to forked workers
+    cams_app.db_pool.close_all()
+    cams_app.history_pool.close_all()
+
+    print(f"🚀 Serving CAMS with {server} on http://{args.host}:{args.port} "
+          f"({args.workers} worker(s) x {args.threads} thread(s), pid {os.getpid()})")
+    print(f"📡 Up to {sse_clients} live dashboard stream(s) per worker, others poll /areas")
+    if server == 'gunicorn':
+        serve_gunicorn(args.host, args.port, args.workers, args.threads)
+    else:
+        serve_waitress(args.host, args.port, args.threads)
+
+
+if __name__ == '__main__':
+    main()
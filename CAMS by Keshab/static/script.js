@@ -1,5 +1,6 @@
 let lastUpdateTime = new Date();
 let refreshInterval;
+let areaStream;
 
 // Toggle mobile menu
 function toggleMenu() {
@@ -26,6 +27,7 @@ function getStatusClass(status) {
         case 'closed': return 'closed';
         case 'busy': return 'busy';
         case 'empty': return 'empty';
+        case 'offline': return 'offline';
         default: return '';
     }
 }
@@ -37,7 +39,7 @@ function createAreaCard(area) {
         '<span class="outdated-warning">⚠ Data might be outdated</span>' : '';
     
     return `
-        <div class="area-card" data-area-id="${area.id}">
+        <div class="area-card" data-area-name="${area.name}">
             <div class="area-header">
                 <h3 class="area-name">${area.name}</h3>
                 <span class="status-badge ${statusClass}">${area.status}</span>
@@ -71,6 +73,60 @@ function getCapacity(status) {
     }
 }
 
+// Replace only the card for this area (or insert it in name order if it's new)
+function updateAreaCard(area) {
+    const areasGrid = document.getElementById('areasGrid');
+    if (!areasGrid) return;
+
+    const template = document.createElement('template');
+    template.innerHTML = createAreaCard(area).trim();
+    const newCard = template.content.firstElementChild;
+
+    const cards = Array.from(areasGrid.children);
+    const existing = cards.find(card => card.dataset.areaName === area.name);
+    if (existing) {
+        existing.replaceWith(newCard);
+        return;
+    }
+    const next = cards.find(card => card.dataset.areaName > area.name);
+    areasGrid.insertBefore(newCard, next || null);
+}
+
+// Listen for pushed changes from /areas/stream (falls back to polling)
+function startAreaStream() {
+    if (!window.EventSource) {
+        refreshInterval = setInterval(fetchAndUpdateAreas, 10000);
+        return;
+    }
+
+    const stream = new EventSource('/areas/stream');
+    areaStream = stream;
+    stream.addEventListener('areas', (event) => {
+        JSON.parse(event.data).forEach(updateAreaCard);
+        lastUpdateTime = new Date();
+        updateRefreshTime();
+    });
+    // after a dropped connection, resync once in case we missed something
+    stream.addEventListener('open', () => {
+        if (refreshInterval) {
+            clearInterval(refreshInterval);
+            refreshInterval = null;
+        }
+        fetchAndUpdateAreas();
+    });
+    // the server refused the stream (503: all live slots busy) => poll, try the stream again later
+    stream.addEventListener('error', () => {
+        if (stream.readyState !== EventSource.CLOSED) {
+            return;  // the browser reconnects by itself
+        }
+        areaStream = null;
+        if (!refreshInterval) {
+            refreshInterval = setInterval(fetchAndUpdateAreas, 10000);
+        }
+        setTimeout(startAreaStream, 60000);
+    });
+}
+
 // Fetch and update areas
 async function fetchAndUpdateAreas() {
     try {
@@ -109,8 +165,8 @@ function initDashboard() {
     // Initial fetch
     fetchAndUpdateAreas();
     
-    // Set up auto-refresh every 10 seconds
-    refreshInterval = setInterval(fetchAndUpdateAreas, 10000);
+    // Live updates pushed by the server instead of polling every 10 seconds
+    startAreaStream();
     // refreshInterval = setInterval(fetchAndUpdateAreas, 10000);
     
     // Update refresh time display every second
@@ -122,6 +178,9 @@ window.addEventListener('beforeunload', () => {
     if (refreshInterval) {
         clearInterval(refreshInterval);
     }
+    if (areaStream) {
+        areaStream.close();
+    }
 });
 
 // Start when DOM is ready
@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+
+
+# -------------------
+# Lightweight IoU tracker
+# -------------------
+def iou_matrix(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    a = a[:, None, :].astype(float)
+    b = b[None, :, :].astype(float)
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+class Track:
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=float)
+        self.last_box = self.box  # where the detector last saw it
+        self.velocity = np.zeros(4)  # per frame
+        self.steps = 0  # frames since the detector last saw it
+        self.hits = 1
+        self.misses = 0
+        self.confirmed = False
+
+
+class PeopleTracker:
+    """Keeps IDs on people across frames so the count stops flickering.
+
+    Detections are matched to existing tracks greedily by IoU. A track only
+    counts once it has been matched `min_hits` times, and is only dropped after
+    `max_misses` detector runs without a match, so one missed or spurious box
+    doesn't change the count. Between detector runs, predict() moves tracks
+    along their (damped) velocity.
+
+    Entries/exits: a track becoming confirmed is an entry, a confirmed track
+    being dropped is an exit.
+    """
+
+    def __init__(self, iou_threshold=0.3, min_hits=3, max_misses=10, velocity_damping=0.8):
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.velocity_damping = velocity_damping
+
+        self.tracks = []
+        self.next_id = 1
+        self.entries = 0
+        self.exits = 0
+
+    def predict(self):
+        """Advance every track one frame without running the detector."""
+        for track in self.tracks:
+            track.box = track.box + track.velocity
+            track.velocity = track.velocity * self.velocity_damping
+            track.steps += 1
+
+    def update(self, xyxy):
+        """Match this frame's detections. Returns a list of ("entry"|"exit", track_id) events."""
+        xyxy = np.asarray(xyxy, dtype=float).reshape(-1, 4)
+        events = []
+
+        for track in self.tracks:
+            track.steps += 1
+
+        matched_tracks, matched_dets = set(), set()
+        if self.tracks and len(xyxy):
+            ious = iou_matrix(np.array([t.box for t in self.tracks]), xyxy)
+            # greedy: best overlaps first
+            for flat in np.argsort(-ious, axis=None):
+                ti, di = np.unravel_index(flat, ious.shape)
+                if ious[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+
+                track = self.tracks[ti]
+                track.velocity = (xyxy[di] - track.last_box) / track.steps
+                track.box = track.last_box = xyxy[di]
+                track.steps = 0
+                track.hits += 1
+                track.misses = 0
+                if not track.confirmed and track.hits >= self.min_hits:
+                    track.confirmed = True
+                    self.entries += 1
+                    events.append(("entry", track.id))
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+                track.box = track.box + track.velocity
+                track.velocity = track.velocity * self.velocity_damping
+                if track.misses > self.max_misses:
+                    if track.confirmed:
+                        self.exits += 1
+                        events.append(("exit", track.id))
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        for di in range(len(xyxy)):
+            if di not in matched_dets:
+                track = Track(self.next_id, xyxy[di])
+                self.next_id += 1
+                if self.min_hits <= 1:
+                    track.confirmed = True
+                    self.entries += 1
+                    events.append(("entry", track.id))
+                self.tracks.append(track)
+
+        return events
+
+    def confirmed_tracks(self):
+        return [t for t in self.tracks if t.confirmed]
+
+    @property
+    def count(self):
+        """Smoothed occupancy: confirmed tracks that haven't been dropped yet."""
+        return len(self.confirmed_tracks())
+
+    def confirmed_boxes(self):
+        tracks = self.confirmed_tracks()
+        if not tracks:
+            return np.empty((0, 4), dtype=int)
+        return np.array([t.box for t in tracks]).astype(int)
+
+    def snapshot(self):
+        """[(track_id, box)] of confirmed tracks, safe to draw later on another thread."""
+        return [(t.id, t.box.copy()) for t in self.confirmed_tracks()]
+
+    def draw(self, frame):
+        return draw_tracks(frame, self.snapshot())
+
+
+def draw_tracks(frame, tracks):
+    for track_id, box in tracks:
+        xmin, ymin, xmax, ymax = np.asarray(box).astype(int)
+        cv2.putText(frame, f'#{track_id}', (xmin + 2, ymax - 6), cv2.FONT_HERSHEY_SIMPLEX, .5, (255, 255, 255), 1)
+    return frame
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+
+# -------------------
+# Background telemetry uploader
+# -------------------
+class TelemetryUploader:
+    """Sends area counts to the CAMS server without blocking the detector.
+
+    submit() only records the latest count per area (older unsent counts for the
+    same area are replaced), and a background thread POSTs them over one
+    persistent requests.Session. Failed sends are retried with exponential
+    backoff. While the server is unreachable the pending counts are kept in a
+    small JSON spool file, so they survive a restart of the detector.
+    """
+
+    def __init__(self, url, spool_path='telemetry_spool.json', timeout=2.0,
+                 base_backoff=1.0, max_backoff=60.0, session=None, verbose=True):
+        self.url = url
+        self.spool_path = spool_path
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.session = session or requests.Session()
+        self.verbose = verbose  # print a line per successful send
+
+        self.pending = {}  # area -> latest payload
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.backoff = 0.0
+
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+
+        self._load_spool()
+        self.thread = threading.Thread(target=self._run, name='TelemetryUploader', daemon=True)
+        self.thread.start()
+
+    # --- spool file (only touched while the server is unreachable) ---
+    def _load_spool(self):
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return
+        try:
+            with open(self.spool_path, 'r', encoding='utf-8') as f:
+                for payload in json.load(f):
+                    self.pending[payload['area']] = payload
+            if self.pending:
+                print(f"📦 Loaded {len(self.pending)} unsent update(s) from {self.spool_path}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print("⚠️ Ignoring unreadable telemetry spool:", e)
+
+    def _write_spool(self):
+        if not self.spool_path:
+            return
+        with self.lock:
+            payloads = list(self.pending.values())
+        try:
+            if payloads:
+                tmp_path = self.spool_path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payloads, f)
+                os.replace(tmp_path, self.spool_path)
+            elif os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+        except OSError as e:
+            print("⚠️ Could not write telemetry spool:", e)
+
+    # --- public API ---
+    def submit(self, area, people_count, timestamp=None, status=None):
+        payload = {
+            "area": area,
+            "people_count": people_count,
+            "timestamp": int(timestamp if timestamp is not None else time.time())
+        }
+        if status is not None:
+            payload["status"] = status  # e.g. "offline" while the camera is disconnected
+        with self.lock:
+            old = self.pending.get(area)
+            if old is not None:
+                if old['timestamp'] > payload['timestamp']:
+                    return
+                self.coalesced += 1
+            self.pending[area] = payload
+        self.wakeup.set()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'pending': len(self.pending),
+                'sent': self.sent,
+                'failed': self.failed,
+                'coalesced': self.coalesced,
+                'backoff': self.backoff,
+            }
+
+    def close(self, timeout=None):
+        """Stop the thread. Anything still unsent is left in the spool file."""
+        self.stopped = True
+        self.wakeup.set()
+        self.thread.join(timeout=timeout if timeout is not None else self.timeout + 1.0)
+        self._write_spool()
+        self.session.close()
+
+    # --- worker ---
+    def _send(self, payload):
+        try:
+            resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            print("⚠️ Failed to POST to server:", e)
+            return False
+        if resp.status_code != 200:
+            print("⚠️ Server error:", resp.status_code)
+            return False
+        return True
+
+    def _run(self):
+        while not self.stopped:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            if self.stopped:
+                break
+
+            with self.lock:
+                batch = list(self.pending.values())
+
+            all_sent = True
+            for payload in batch:
+                if self.stopped:
+                    break
+                if self._send(payload):
+                    with self.lock:
+                        # drop it unless a newer count arrived while we were sending
+                        if self.pending.get(payload['area']) is payload:
+                            del self.pending[payload['area']]
+                        self.sent += 1
+                    if self.verbose:
+                        print(f"🌐 Sent to server ...")
+                else:
+                    with self.lock:
+                        self.failed += 1
+                    all_sent = False
+                    break  # server is down/slow, no point trying the other areas now
+
+            if all_sent:
+                if self.backoff:
+                    self._write_spool()  # server is back, clear the spool
+                self.backoff = 0.0
+                continue
+
+            # back off, keep the pending counts on disk and try again later
+            self.backoff = min(self.max_backoff, self.backoff * 2 if self.backoff else self.base_backoff)
+            self._write_spool()
+            self._sleep(self.backoff)
+            self.wakeup.set()  # retry whatever is still pending
+
+    def _sleep(self, seconds):
+        # sleep in small steps so close() doesn't wait for a long backoff
+        deadline = time.monotonic() + seconds
+        while not self.stopped and time.monotonic() < deadline:
+            time.sleep(min(0.1, deadline - time.monotonic()))
+
+
+# -------------------
+# Manual check against a local stand-in server
+#   python uploader.py
+# -------------------
+if __name__ == '__main__':
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    received = []
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            received.append(json.loads(body))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/update_status"
+
+    uploader = TelemetryUploader(url, spool_path=None)
+    for count in range(5):
+        uploader.submit("Library", count)
+    uploader.submit("Canteen", 3)
+    time.sleep(1.0)
+    uploader.close()
+    server.shutdown()
+
+    print("Received:", received)
+    print("Stats:", uploader.stats())
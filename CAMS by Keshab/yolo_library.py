@@ -1,470 +1,756 @@
-import sqlite3
 import os
 import sys
 import argparse
 import glob
 import time
-import requests
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from datetime import datetime
+from backends import BACKENDS, ModelLoader
+from capture import FrameGrabber, img_ext_list, parse_source
+from db_writer import DBWriter
+from history import HISTORY_DB, init_history, record_statements
+from inference_size import FrameScaler, ImgszController
+from metrics import REGISTRY, detector_metrics, register_stats, serve_metrics
+from annotator import AsyncAnnotator
+from detections import extract_detections, draw_detections
+from motion_gate import MotionGate
+from multi_camera import load_camera_config, run_multi_camera
+from occupancy import CAMS_DB, OFFLINE_STATUS, OccupancySink
+from recorder import VideoRecorder
+from tracker import PeopleTracker, draw_tracks
+from zones import ZoneCounter, load_zones
+
+# ultralytics/torch are imported by the model loader thread, requests only when POST_TO_SERVER is on
 
 
-# -------------------
-# CLI arguments
-# -------------------
-parser = argparse.ArgumentParser()
-parser.add_argument('--model', help='Path to YOLO model file (example: "runs/detect/train/weights/best.pt")',
-                    required=True)
-parser.add_argument('--source', help='Image source, can be image file ("test.jpg"), \
-                    image folder ("test_dir"), video file ("testvid.mp4"), or index of USB camera ("usb0")', 
-                    required=True)
-parser.add_argument('--thresh', help='Minimum confidence threshold for displaying detected objects (example: "0.4")',
-                    default=0.5)
-parser.add_argument('--resolution', help='Resolution in WxH to display inference results at (example: "640x480"), \
-                    otherwise, match source resolution',
-                    default=None)
-parser.add_argument('--record', help='Record results from video or webcam and save it as "demo1.avi". Must specify --resolution argument to record.',
-                    action='store_true')
-
-args = parser.parse_args()
-
 # -------------------
 # Config (tune here)
 # -------------------
 FRAME_SKIP = 5      # 0 => process every frame (as you asked). Set >0 to skip frames (reduce CPU)
-MIN_CONF_THRESH = float(args.thresh)
-USER_RES = args.resolution
-RECORD = args.record
+MOTION_GATE = True  # True => skip YOLO while the scene is unchanged (replaces the fixed FRAME_SKIP stride)
+MOTION_THRESHOLD = 0.01  # fraction of (downscaled) pixels that must change to run inference
+MAX_STALENESS = 5.0  # seconds; force a real inference at least this often
+GATE_LOG_INTERVAL = 30.0  # seconds between motion gate log lines
+TRACKING = True  # True => report a tracked (de-flickered) count instead of raw boxes per frame
+TRACK_MIN_HITS = 3  # detector runs a person must be seen before being counted
+TRACK_MAX_MISSES = 10  # detector runs a person may go unseen before being dropped
+ANNOTATE_FPS = 10.0  # headless mode: max annotated frames per second for --record/--preview
+WINDOW_NAME = 'YOLO detection results'
+RECORD_PREFIX = 'demo'  # recordings are named demo_YYYYmmdd_HHMMSS_NNN.mp4
+RECORD_SEGMENT_SECONDS = 600  # start a new file every 10 minutes...
+RECORD_SEGMENT_MB = 200  # ...or once the current one reaches this size
+RECORD_QUEUE = 64  # frames waiting for the disk before new ones are dropped
 POST_TO_SERVER = True  # set False if you don’t want to send
 # SERVER_POST_URL = "http://127.0.0.1:5000"  # replace with your CAMS API endpoint
 SERVER_POST_URL = "http://127.0.0.1:5000/update_status"  # replace with your CAMS API endpoint
 POST_INTERVAL = 10.0  # seconds between updates
-last_post_time = time.time()
-
-# -------------------
-# Validate model path
-# -------------------
-model_path = args.model
-img_source = args.source
-
-if not os.path.exists(model_path):
-    print('ERROR: Model path is invalid or model was not found. Make sure the model filename was entered correctly.')
-    sys.exit(1)
+TELEMETRY_SPOOL = "telemetry_spool.json"  # unsent updates are kept here while the server is down
+LOCAL_HISTORY = not POST_TO_SERVER  # write history.db here; when posting, the server records history from the posts
+CAPTURE_BUFFER_SIZE = 2  # frames held by the capture thread (oldest dropped for live sources)
+RECONNECT_BACKOFF = 1.0  # seconds before reopening a dropped usb/stream source (doubles per failed try)...
+RECONNECT_MAX_BACKOFF = 30.0  # ...up to this
+INFER_IMGSZ = 640  # default --imgsz: input size the model runs at (exported onnx/openvino models are built for it)
+MIN_IMGSZ = 320  # --target-fps never goes below this input size
+WARMUP_SIZE = (640, 480)  # warm-up frame size when --resolution is not given
+COUNT_CLASSES = None  # None => count every class. Example: [0] to count only class 0 ("person")
+STATUS_HEARTBEAT = 60.0  # seconds; rewrite an unchanged area_status row this often
+STATUS_MIN_INTERVAL = 2.0  # seconds; a changing count is written at most this often per area
+DB_BATCH_SIZE = 200  # queued statements per SQLite transaction
+DB_FLUSH_INTERVAL = 2.0  # max seconds a queued row waits before being written
+METRICS_PORT = 9108  # default --metrics-port: Prometheus text metrics on http://METRICS_HOST:9108/metrics
+METRICS_HOST = '127.0.0.1'  # '0.0.0.0' => also reachable from other machines
 
 # -------------------
-# Load model
+# Metrics (scraped from --metrics-port; stats() based ones cost nothing per frame)
 # -------------------
-try:
-    model = YOLO(model_path, task='detect')
-except Exception as e:
-    print("ERROR: Failed to load YOLO model:", e)
-    sys.exit(1)
+STAGE_MS, FRAMES_INFERRED = detector_metrics()  # shared with multi_camera
+FRAMES_SKIPPED = REGISTRY.counter('cams_frames_skipped_total', 'Frames not inferred (motion gate / FRAME_SKIP)')
+PEOPLE = REGISTRY.gauge('cams_people', 'Latest people count', labels=('area',))
+STARTUP_SECONDS = REGISTRY.gauge('cams_startup_seconds', 'Seconds from start until each start-up step finished',
+                                 labels=('step',))
 
-labels = model.names if hasattr(model, 'names') else {}
 
 # -------------------
-# Helper lists and extensions
+# CLI arguments
 # -------------------
-img_ext_list = ['.jpg','.JPG','.jpeg','.JPEG','.png','.PNG','.bmp','.BMP']
-vid_ext_list = ['.avi','.mov','.mp4','.mkv','.wmv']
+def build_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', help='Path to YOLO model file (example: "runs/detect/train/weights/best.pt")',
+                        required=True)
+    parser.add_argument('--source', help='Image source, can be image file ("test.jpg"), \
+                        image folder ("test_dir"), video file ("testvid.mp4"), or index of USB camera ("usb0")',
+                        default=None)
+    parser.add_argument('--area', help='Area name to report counts under (example: "Library")',
+                        default='Library')
+    parser.add_argument('--config', help='JSON file mapping area names to sources (example: "cameras.json"). \
+                        Runs every camera in this process with one shared model and batched inference.',
+                        default=None)
+    parser.add_argument('--zones', help='JSON file of polygon zones for this camera (example: "zones.json"). \
+                        Only the zones are sent to the model and each zone reports its own area_status row.',
+                        default=None)
+    parser.add_argument('--thresh', help='Minimum confidence threshold for displaying detected objects (example: "0.4")',
+                        default=0.5)
+    parser.add_argument('--resolution', help='Resolution in WxH to display inference results at (example: "640x480"), \
+                        otherwise, match source resolution',
+                        default=None)
+    parser.add_argument('--imgsz', help='Model input size (long side, multiple of 32) independent of --resolution \
+                        (example: "416"). Smaller is faster but misses small/far people.',
+                        type=int, default=INFER_IMGSZ)
+    parser.add_argument('--target-fps', help='Lower/raise the model input size at runtime (between 320 and --imgsz) \
+                        to keep inferred frames at this rate (example: "8"). PyTorch backend only.',
+                        type=float, default=None)
+    parser.add_argument('--backend', help='Inference backend: "pt" (PyTorch), "onnx", "openvino", or "auto" to benchmark \
+                        and use the fastest. Exported models are cached next to the .pt file.',
+                        choices=list(BACKENDS) + ['auto'], default='pt')
+    parser.add_argument('--int8', help='Use an INT8-quantized export (onnx/openvino backends only)',
+                        action='store_true')
+    parser.add_argument('--record', help='Record results from video or webcam to demo_<date>_<time>_<segment>.mp4 files (rotated). Must specify --resolution argument to record.',
+                        action='store_true')
+    parser.add_argument('--headless', help='No window and no drawing: only counts, database writes and telemetry. \
+                        With --record/--preview, annotation runs on a separate thread at a reduced rate.',
+                        action='store_true')
+    parser.add_argument('--preview', help='With --headless, still show a (reduced rate) preview window',
+                        action='store_true')
+    parser.add_argument('--metrics-port', help=f'Port for Prometheus metrics on {METRICS_HOST} (0 => off)',
+                        type=int, default=METRICS_PORT)
+    return parser
 
-# -------------------
-# Determine source type
-# -------------------
-if os.path.isdir(img_source):
-    source_type = 'folder'
-elif os.path.isfile(img_source):
-    _, ext = os.path.splitext(img_source)
-    if ext in img_ext_list:
-        source_type = 'image'
-    elif ext in vid_ext_list:
-        source_type = 'video'
-    else:
-        print(f'File extension {ext} is not supported.')
-        sys.exit(1)
-elif img_source.startswith('usb'):
-    source_type = 'usb'
-    try:
-        usb_idx = int(img_source[3:])
-    except Exception:
-        print('ERROR: usb index parse failed. Example usage: usb0')
-        sys.exit(1)
-elif img_source.startswith('picamera'):
-    source_type = 'picamera'
-    try:
-        picam_idx = int(img_source[8:])
-    except Exception:
-        picam_idx = 0
-else:
-    # allow IP camera / stream URLs and numeric webcam indices passed directly as "0"
-    # try parse an integer (webcam index) else assume URL
-    try:
-        idx = int(img_source)
-        source_type = 'usb'
-        usb_idx = idx
-    except Exception:
-        # assume it's a stream url
-        # we will check it later by trying to open it
-        source_type = 'stream'
 
 # -------------------
-# Parse resolution
+# Source helpers
 # -------------------
-resize = False
-resW = resH = None
-if USER_RES:
+def parse_resolution(text):
+    """'640x480' -> (640, 480); None (with a warning) if malformed."""
     try:
-        resW, resH = int(USER_RES.split('x')[0]), int(USER_RES.split('x')[1])
-        resize = True
+        return int(text.split('x')[0]), int(text.split('x')[1])
     except Exception:
         print("WARNING: --resolution malformed. Expected format '640x480'. Ignoring resolution argument.")
-        resize = False
-        resW = resH = None
+        return None
 
-# -------------------
-# Recorder setup (only for video / camera / stream)
-# -------------------
-recorder = None
-if RECORD:
-    if source_type not in ['video', 'usb', 'stream']:
-        print('Recording only works for video, camera, or stream sources. Please try again.')
+
+def detect_source(img_source):
+    """(source_type, usb/picamera index or None) for the --source argument."""
+    try:
+        source_type, arg = parse_source(img_source)
+    except ValueError as e:
+        print(f'ERROR: {e}')
         sys.exit(1)
-    if not resize:
-        print('Please specify resolution to record video at using --resolution.')
+    return source_type, arg if source_type in ('usb', 'picamera') else None
+
+
+def open_source(source_type, img_source, source_idx, resolution):
+    """(cap, imgs_list) for the source; exits if it cannot be opened."""
+    imgs_list = []
+    cap = None
+    if source_type == 'image':
+        imgs_list = [img_source]
+    elif source_type == 'folder':
+        filelist = sorted(glob.glob(os.path.join(img_source, '*')))
+        for file in filelist:
+            _, file_ext = os.path.splitext(file)
+            if file_ext in img_ext_list:
+                imgs_list.append(file)
+    elif source_type == 'video':
+        cap = cv2.VideoCapture(img_source)
+    elif source_type == 'usb':
+        cap = cv2.VideoCapture(source_idx)
+    elif source_type == 'picamera':
+        try:
+            from picamera2 import Picamera2
+            cap = Picamera2()
+            if resolution:
+                cap.configure(cap.create_video_configuration(main={"format": 'XRGB8888', "size": resolution}))
+            cap.start()
+        except Exception as e:
+            print("ERROR: Failed to initialize Picamera2:", e)
+            sys.exit(1)
+    elif source_type == 'stream':
+        cap = cv2.VideoCapture(img_source)
+    else:
+        print("Unknown source type. Exiting.")
         sys.exit(1)
-    record_name = 'demo1.avi'
-    record_fps = 30
-    fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-    recorder = cv2.VideoWriter(record_name, fourcc, record_fps, (resW, resH))
 
-# -------------------
-# Load/initialize image source
-# -------------------
+    # If using cv2 capture, check valid
+    if cap is not None and source_type != 'picamera' and not cap.isOpened():
+        print("ERROR: Could not open video capture. Check source/URL.")
+        sys.exit(1)
+    return cap, imgs_list
 
-def update_databases(area_name, people_count):
-    if people_count == 0:
-        status = "empty"
-    elif people_count < 10:
-        status = "open"
-    elif people_count < 30:
-        status = "busy"
-    else:
-        status = "closed"
-
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Insert into area-specific DB
-    db_name = "library.db"
-    conn_area = sqlite3.connect(db_name)
-    c_area = conn_area.cursor()
-    c_area.execute("""
-        INSERT INTO records (timestamp, people_count, status)
-        VALUES (?, ?, ?)
-    """, (timestamp, people_count, status))
-    conn_area.commit()
-    conn_area.close()
-
-    print(f"✅ Updated {area_name} ...")
-
-
-imgs_list = []
-cap = None
-if source_type == 'image':
-    imgs_list = [img_source]
-elif source_type == 'folder':
-    filelist = sorted(glob.glob(os.path.join(img_source, '*')))
-    for file in filelist:
-        _, file_ext = os.path.splitext(file)
-        if file_ext in img_ext_list:
-            imgs_list.append(file)
-elif source_type == 'video':
-    cap_arg = img_source
-    cap = cv2.VideoCapture(cap_arg)
-elif source_type == 'usb':
-    cap_arg = usb_idx
-    cap = cv2.VideoCapture(cap_arg)
-elif source_type == 'picamera':
+
+def wait_for_model(loader, started):
     try:
-        from picamera2 import Picamera2
-        cap = Picamera2()
-        if resize:
-            cap.configure(cap.create_video_configuration(main={"format": 'XRGB8888', "size": (resW, resH)}))
-        cap.start()
+        model = loader.result()
     except Exception as e:
-        print("ERROR: Failed to initialize Picamera2:", e)
+        print("ERROR: Failed to load YOLO model:", e)
         sys.exit(1)
-elif source_type == 'stream':
-    cap = cv2.VideoCapture(img_source)
-else:
-    print("Unknown source type. Exiting.")
-    sys.exit(1)
+    ready = time.perf_counter() - started
+    STARTUP_SECONDS.labels('model_ready').set(ready)
+    print(f"🧠 Inference backend: {loader.backend} (loaded in {loader.load_s:.2f} s, "
+          f"warm-up {loader.warmup_s:.2f} s, ready {ready:.2f} s after start)")
+    return model
 
-# If using cv2 capture, check valid
-if cap is not None and not cap.isOpened():
-    print("ERROR: Could not open video capture. Check source/URL.")
-    sys.exit(1)
-
-# -------------------
-# Colors for boxes
-# -------------------
-bbox_colors = [(164,120,87), (68,148,228), (93,97,209), (178,182,133), (88,159,106),
-              (96,202,231), (159,124,168), (169,162,241), (98,118,150), (172,176,184)]
 
 # -------------------
-# Loop variables for FPS and image counting
+# Main
 # -------------------
-avg_frame_rate = 0.0
-frame_rate_buffer = []
-fps_avg_len = 200
-img_count = 0
-frame_idx = 0
-last_object_count = 0
+def main(argv=None):
+    started = time.perf_counter()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.source is None and args.config is None:
+        parser.error('one of --source or --config is required')
+
+    min_conf_thresh = float(args.thresh)
+    headless = args.headless
+    area_name = args.area
+    model_path = args.model
+    img_source = args.source
+
+    # -------------------
+    # Validate model path
+    # -------------------
+    if not os.path.exists(model_path):
+        print('ERROR: Model path is invalid or model was not found. Make sure the model filename was entered correctly.')
+        sys.exit(1)
 
-# -------------------
-# Inference loop
-# -------------------
-try:
-    while True:
-        t_start = time.perf_counter()
-
-        # Frame acquisition
-        frame = None
-        if source_type in ('image', 'folder'):
-            if img_count >= len(imgs_list):
-                print('All images have been processed. Exiting program.')
-                break
-            img_filename = imgs_list[img_count]
-            frame = cv2.imread(img_filename)
-            img_count += 1
+    resolution = parse_resolution(args.resolution) if args.resolution else None
+    imgsz = max(32, round(args.imgsz / 32) * 32)  # the model's stride
+    if imgsz != args.imgsz:
+        print(f"WARNING: --imgsz must be a multiple of 32, using {imgsz}.")
+
+    # -------------------
+    # Load model (background thread: load + one warm-up inference while the source opens)
+    # -------------------
+    loader = ModelLoader(model_path, args.backend, imgsz=imgsz, int8=args.int8,
+                         warmup_size=resolution or WARMUP_SIZE)
+
+    # -------------------
+    # Database / server helpers
+    # -------------------
+
+    # one background writer keeps cams.db and history.db open and batches the writes
+    if LOCAL_HISTORY:
+        init_history(HISTORY_DB)
+    db_writer = DBWriter(batch_size=DB_BATCH_SIZE, flush_interval=DB_FLUSH_INTERVAL)
+
+    def update_databases(area_name, people_count):
+        # Raw sample + minute/hour/day rollups in history.db (queued, written in batches)
+        if LOCAL_HISTORY:
+            for sql, params in record_statements(area_name, time.time(), people_count):
+                db_writer.submit(HISTORY_DB, sql, params)
+
+        print(f"✅ Updated {area_name} ...")
+
+    # --- Database setup (Keshab edit 0) ---
+    # area_status rows are written only when the count/status changes (or on a heartbeat)
+    occupancy = OccupancySink(CAMS_DB, writer=db_writer, heartbeat=STATUS_HEARTBEAT,
+                              min_interval=STATUS_MIN_INTERVAL)
+
+    # POSTs run on a background thread (latest count per area, retried with backoff)
+    uploader = None
+    if POST_TO_SERVER:
+        from uploader import TelemetryUploader
+        uploader = TelemetryUploader(SERVER_POST_URL, spool_path=TELEMETRY_SPOOL)
+
+    # per-area timers so every camera keeps its own POST schedule
+    start_time = time.time()
+    last_post_time = {}
+
+    register_stats('cams_db', db_writer, counters=('rows_written', 'rows_failed', 'rows_dropped', 'flushes'),
+                   gauges=('queue_depth',))
+    register_stats('cams_area_status', occupancy, counters=('updates', 'writes'))
+    if uploader is not None:
+        register_stats('cams_telemetry', uploader, counters=('sent', 'failed'), gauges=('pending', 'backoff'))
+    if args.metrics_port:
+        try:
+            serve_metrics(args.metrics_port, host=METRICS_HOST)
+            print(f"📈 Metrics on http://{METRICS_HOST}:{args.metrics_port}/metrics")
+        except OSError as e:
+            print(f"⚠️ Metrics port {args.metrics_port} unavailable ({e}), metrics disabled")
+
+    def close_writers():
+        if uploader is not None:
+            uploader.close()
+            up_stats = uploader.stats()
+            print(f"Telemetry sent: {up_stats['sent']}, failed attempts: {up_stats['failed']}, "
+                  f"unsent (spooled): {up_stats['pending']}")
+        occupancy.close()
+        occ_stats = occupancy.stats()
+        print(f"area_status writes: {occ_stats['writes']} for {occ_stats['updates']} counts")
+        db_writer.close()
+        db_stats = db_writer.stats()
+        print(f"DB rows written: {db_stats['rows_written']}, failed: {db_stats['rows_failed']}, "
+              f"dropped: {db_stats['rows_dropped']}, flushes: {db_stats['flushes']}, "
+              f"max flush: {db_stats['max_flush_ms']:.1f} ms")
+
+    def report_count(area, object_count):
+        PEOPLE.labels(area).set(object_count)
+        update_databases(area, object_count)
+
+        # --- area_status update when the count changes (Keshab edit 0) ---
+        now = time.time()
+        written = occupancy.update(area, object_count, now)
+        if written:
+            db_stats = db_writer.stats()
+            print(f"📥 Saved to DB: area={area}, count={object_count} "
+                  f"(queue: {db_stats['queue_depth']}, last flush: {db_stats['last_flush_ms']:.1f} ms)")
+        # (Keshab edit 1)
 
-            if frame is None:
-                print(f'WARNING: Could not read image {img_filename}. Skipping.')
-                continue
+        # --- Send data to backend on every area_status write (so the dashboard's live
+        # updates and cache see it right away) and at least every POST_INTERVAL seconds ---
+        if uploader is not None:
+            if written or now - last_post_time.get(area, start_time) >= POST_INTERVAL:
+                last_post_time[area] = now
+                uploader.submit(area, object_count, now)
 
+    def mark_offline(areas):
+        # area_status shows "offline" with the last count until the camera is back
+        now = time.time()
+        for area in areas:
+            count = occupancy.mark_offline(area, now)
+            if uploader is not None:
+                uploader.submit(area, count, now, status=OFFLINE_STATUS)
+        print(f"📴 Marked offline: {', '.join(areas)}")
+
+    def mark_online(areas):
+        # frames flow again: drop "offline" now instead of at the next changed count
+        now = time.time()
+        for area in areas:
+            count = occupancy.mark_online(area, now)
+            if uploader is not None:
+                uploader.submit(area, count, now)
+        print(f"📶 Back online: {', '.join(areas)}")
+
+    # -------------------
+    # Multi-camera mode (one model, batched inference across sources)
+    # -------------------
+    if args.config:
+        if args.record:
+            print('Recording is not supported with --config. Please try again.')
+            sys.exit(1)
+        if args.zones:
+            print('--zones is not supported with --config, put the zones in the camera config instead.')
+            sys.exit(1)
+        if args.target_fps:
+            print('--target-fps is not supported with --config. Please try again.')
+            sys.exit(1)
+        if args.preview:
+            print('--preview is not supported with --config, run without --headless to see the cameras.')
+            sys.exit(1)
+        try:
+            cameras = load_camera_config(args.config)
+        except Exception as e:
+            print("ERROR: Failed to load camera config:", e)
+            sys.exit(1)
+
+        model = wait_for_model(loader, started)
+        labels = model.names if hasattr(model, 'names') else {}
+        run_multi_camera(model, cameras, min_conf_thresh, report_count, labels=labels,
+                         classes=COUNT_CLASSES, resolution=resolution, buffer_size=CAPTURE_BUFFER_SIZE,
+                         imgsz=imgsz, show=not headless, on_offline=mark_offline, on_online=mark_online,
+                         reconnect_backoff=RECONNECT_BACKOFF, reconnect_max_backoff=RECONNECT_MAX_BACKOFF)
+        close_writers()
+        sys.exit(0)
+
+    # -------------------
+    # Determine source type
+    # -------------------
+    source_type, source_idx = detect_source(img_source)
+
+    # -------------------
+    # Parse resolution
+    # -------------------
+    resize = resolution is not None
+    resW, resH = resolution if resize else (None, None)
+
+    # -------------------
+    # Recorder setup (only for video / camera / stream)
+    # -------------------
+    recorder = None
+    if args.record:
+        if source_type not in ['video', 'usb', 'stream']:
+            print('Recording only works for video, camera, or stream sources. Please try again.')
+            sys.exit(1)
+        if not resize:
+            print('Please specify resolution to record video at using --resolution.')
+            sys.exit(1)
+        # frame rate is measured from the loop, files rotate by time/size, writes happen off-thread
+        recorder = VideoRecorder(RECORD_PREFIX, (resW, resH), segment_seconds=RECORD_SEGMENT_SECONDS,
+                                 segment_mb=RECORD_SEGMENT_MB, max_queue=RECORD_QUEUE)
+
+    # -------------------
+    # Load/initialize image source (while the model warms up)
+    # -------------------
+    cap, imgs_list = open_source(source_type, img_source, source_idx, resolution)
+    STARTUP_SECONDS.labels('source_open').set(time.perf_counter() - started)
+
+    # Optional ROI zones: infer on their bounding box only, count per zone
+    zone_counter = None
+    if args.zones:
+        try:
+            zone_counter = ZoneCounter(load_zones(args.zones))
+        except Exception as e:
+            print("ERROR: Failed to load zones:", e)
+            sys.exit(1)
+        print(f"🗺️ Counting zones: {', '.join(zone_counter.names)}")
+
+    model = wait_for_model(loader, started)
+    labels = model.names if hasattr(model, 'names') else {}
+
+    # What the model sees is resized once into a reused buffer, separately from the display/record frame
+    scaler = FrameScaler(imgsz)
+    imgsz_controller = None
+    if args.target_fps:
+        if loader.backend == 'pt':
+            imgsz_controller = ImgszController(args.target_fps, max_imgsz=imgsz, min_imgsz=MIN_IMGSZ)
         else:
-            # video/usb/stream/picamera
-            if source_type == 'picamera':
-                frame_bgra = cap.capture_array()
-                if frame_bgra is None:
-                    print('Unable to capture from Picamera. Exiting.')
+            print(f"⚠️ --target-fps needs the pt backend ({loader.backend} models are built for one input size), "
+                  f"staying at {imgsz}")
+
+    # Decode on a background thread so a slow model never backs up the camera
+    # (started only now, so no frames are read and dropped while the model warms up).
+    # usb/stream sources that drop are reopened with backoff; the model and writers stay as they are.
+    grabber = None
+    if cap is not None:
+        reopen = None
+        if source_type in ('usb', 'stream'):
+            cap_arg = source_idx if source_type == 'usb' else img_source
+            reopen = lambda: cv2.VideoCapture(cap_arg)
+        reported_areas = zone_counter.names if zone_counter is not None else [area_name]
+        grabber = FrameGrabber(cap, source_type, buffer_size=CAPTURE_BUFFER_SIZE, reopen=reopen,
+                               backoff=RECONNECT_BACKOFF, max_backoff=RECONNECT_MAX_BACKOFF,
+                               on_disconnect=lambda: mark_offline(reported_areas),
+                               on_reconnect=lambda: mark_online(reported_areas)).start()
+
+    # -------------------
+    # Loop variables for FPS and image counting
+    # -------------------
+    avg_frame_rate = 0.0
+    frame_rate_buffer = []
+    fps_avg_len = 200
+    img_count = 0
+    frame_idx = 0
+    last_object_count = 0
+    first_detection = None
+    motion_gate = MotionGate(threshold=MOTION_THRESHOLD, max_staleness=MAX_STALENESS) if MOTION_GATE else None
+    last_gate_log = time.time()
+    tracker = None
+    if TRACKING and source_type not in ('image', 'folder'):
+        tracker = PeopleTracker(min_hits=TRACK_MIN_HITS, max_misses=TRACK_MAX_MISSES)
+
+    if grabber is not None:
+        register_stats('cams_frames', {area_name: grabber}, counters=('captured', 'processed', 'dropped'),
+                       gauges=('buffered',), label='camera')
+        register_stats('cams_camera', {area_name: grabber}, counters=('disconnects', 'reconnects', 'downtime_seconds'),
+                       gauges=('connected',), label='camera')
+    if motion_gate is not None:
+        register_stats('cams_motion_gate', motion_gate, counters=('checked', 'inferred', 'skipped'))
+    if tracker is not None:
+        REGISTRY.function('cams_tracker_entries_total', 'People who entered (confirmed tracks)',
+                          lambda: tracker.entries, kind='counter')
+        REGISTRY.function('cams_tracker_exits_total', 'People who left (dropped confirmed tracks)',
+                          lambda: tracker.exits, kind='counter')
+    stage_capture, stage_resize, stage_gate = STAGE_MS.labels('capture'), STAGE_MS.labels('resize'), STAGE_MS.labels('motion_gate')
+    stage_scale, stage_inference, stage_post = STAGE_MS.labels('scale'), STAGE_MS.labels('inference'), STAGE_MS.labels('postprocess')
+    REGISTRY.function('cams_imgsz', 'Model input size in use', lambda: scaler.imgsz)
+    stage_output, stage_report = STAGE_MS.labels('output'), STAGE_MS.labels('report')
+
+    no_detections = extract_detections(None, min_conf_thresh)
+
+    def overlay_lines(object_count):
+        # (text, y) pairs drawn in the top-left corner
+        lines = []
+        if source_type in ('video', 'usb', 'picamera', 'stream'):
+            lines.append((f'FPS: {avg_frame_rate:0.2f} (imgsz {scaler.imgsz})', 20))
+            if grabber is not None:
+                cap_stats = grabber.stats()
+                lines.append((f'Dropped: {cap_stats["dropped"]} / Processed: {cap_stats["processed"]}', 60))
+            if motion_gate is not None:
+                gate_stats = motion_gate.stats()
+                lines.append((f'Inferred: {gate_stats["infer_ratio"]*100:.0f}% of frames, saved {gate_stats["cpu_saved_ms"]/1000:.1f} s CPU', 80))
+            if tracker is not None:
+                lines.append((f'Entries: {tracker.entries} / Exits: {tracker.exits}', 100))
+        lines.append((f'Number of objects: {object_count}', 40))
+        return lines
+
+    def annotate_frame(frame, detections, zone_counts, tracks, lines):
+        xyxy, cls, conf = detections
+        if zone_counter is not None and zone_counts is not None:
+            zone_counter.draw(frame, zone_counts)
+        draw_detections(frame, xyxy, cls, conf, labels)
+        if tracks:
+            draw_tracks(frame, tracks)
+        for text, y in lines:
+            cv2.putText(frame, text, (10,y), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
+        return frame
+
+    # Headless: draw only if something consumes the pictures, and never on this thread
+    annotator = None
+    preview = headless and args.preview
+    if headless and (recorder is not None or preview):
+        sinks = [recorder.write] if recorder is not None else []
+        annotator = AsyncAnnotator(annotate_frame, sinks, max_fps=ANNOTATE_FPS, keep_latest=preview)
+
+    def show_preview():
+        """--headless --preview: show the newest annotated frame from this thread. True => q pressed."""
+        preview_frame = annotator.take_latest()
+        if preview_frame is not None:
+            cv2.imshow(WINDOW_NAME, preview_frame)
+        return cv2.waitKey(1) & 0xFF == ord('q')
+
+    def output_frame(frame, detections=no_detections, zone_counts=None, tracks=None, lines=()):
+        """Annotate + show/record a frame (inline normally, off-thread or not at all when headless)."""
+        if annotator is not None:
+            annotator.submit(frame, detections, zone_counts, tracks, lines)
+        elif not headless:
+            annotate_frame(frame, detections, zone_counts, tracks, lines)
+            cv2.imshow(WINDOW_NAME, frame)
+            if recorder is not None:
+                recorder.write(frame)
+
+    def gate_summary():
+        gate_stats = motion_gate.stats()
+        return (f"inferred {gate_stats['inferred']}/{gate_stats['checked']} frames "
+                f"({gate_stats['infer_ratio']*100:.0f}%), ~{gate_stats['cpu_saved_ms']/1000:.1f} s CPU saved")
+
+    # -------------------
+    # Inference loop
+    # -------------------
+    try:
+        while True:
+            if preview and show_preview():
+                break
+            t_start = time.perf_counter()
+
+            # Frame acquisition
+            frame = None
+            if source_type in ('image', 'folder'):
+                if img_count >= len(imgs_list):
+                    print('All images have been processed. Exiting program.')
                     break
-                frame = cv2.cvtColor(np.copy(frame_bgra), cv2.COLOR_BGRA2BGR)
+                img_filename = imgs_list[img_count]
+                frame = cv2.imread(img_filename)
+                img_count += 1
+
+                if frame is None:
+                    print(f'WARNING: Could not read image {img_filename}. Skipping.')
+                    continue
+
             else:
-                ret, frame = cap.read()
-                if not ret or frame is None:
+                # video/usb/stream/picamera -> freshest frame from the capture thread
+                frame = grabber.read(timeout=1.0)
+                if frame is None and not grabber.ended:
+                    # reconnecting (or just a slow source): keep the window responsive and wait
+                    if not headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+                    continue
+                if frame is None:
                     # If video file ended, break. If camera failed, print and exit.
                     if source_type == 'video':
                         print('Reached end of the video file. Exiting program.')
-                        break
+                    elif source_type == 'picamera':
+                        print('Unable to capture from Picamera. Exiting.')
                     else:
                         print('Unable to read frames from the camera/stream. Exiting program.')
-                        break
+                    break
+
+            t_mark = t_acquired = time.perf_counter()
+            stage_capture.observe((t_mark - t_start) * 1000.0)
 
-        # Optional resize
-        if resize:
+            # Optional resize
+            if resize:
+                try:
+                    frame = cv2.resize(frame, (resW, resH))
+                except Exception as e:
+                    print("WARNING: Resize failed:", e)
+
+            # Region the model sees: the zones' bounding box, or the whole frame
+            if zone_counter is not None:
+                infer_frame, (off_x, off_y) = zone_counter.crop(frame)
+            else:
+                infer_frame, (off_x, off_y) = frame, (0, 0)
+            t_now = time.perf_counter()
+            stage_resize.observe((t_now - t_mark) * 1000.0)
+            t_mark = t_now
+
+            # Skip model inference on some frames: motion gate (adaptive) or fixed FRAME_SKIP stride
+            if motion_gate is not None and source_type not in ('image', 'folder'):
+                skip_inference = not motion_gate.should_infer(infer_frame)
+                if time.time() - last_gate_log >= GATE_LOG_INTERVAL:
+                    last_gate_log = time.time()
+                    print(f"🎯 Motion gate: {gate_summary()}")
+            else:
+                skip_inference = FRAME_SKIP > 0 and (frame_idx % (FRAME_SKIP + 1) != 0)
+            t_now = time.perf_counter()
+            stage_gate.observe((t_now - t_mark) * 1000.0)
+
+            if skip_inference:
+                FRAMES_SKIPPED.inc()
+                if tracker is not None:
+                    tracker.predict()  # keep track positions moving between detector runs
+                # Just display and optionally record without running inference
+                # (scene unchanged -> the last count still holds)
+                lines = [(f'Number of objects: {last_object_count} (no motion)', 40)] if motion_gate is not None else ()
+                output_frame(frame, lines=lines)
+                stage_output.observe((time.perf_counter() - t_now) * 1000.0)
+                frame_idx += 1
+                if not headless and cv2.waitKey(1) & 0xFF == 27:
+                    break
+                # update FPS bookkeeping quickly (approx)
+                t_stop = time.perf_counter()
+                frame_rate_calc = float(1.0 / max((t_stop - t_start), 1e-6))
+                frame_rate_buffer.append(frame_rate_calc)
+                if len(frame_rate_buffer) > fps_avg_len:
+                    frame_rate_buffer.pop(0)
+                avg_frame_rate = float(np.mean(frame_rate_buffer))
+                continue
+
+            # -----------------------
+            # Run inference (wrapped with try/except so a single bad frame won't crash)
+            # -----------------------
+            results = None
+            model_input = scaler.resize(infer_frame)
+            t_infer = time.perf_counter()
+            stage_scale.observe((t_infer - t_now) * 1000.0)
             try:
-                frame = cv2.resize(frame, (resW, resH))
+                # Using direct call on frame (Ultralytics supports this)
+                results = model(model_input, imgsz=scaler.imgsz, verbose=False)
+                t_mark = time.perf_counter()
+                infer_ms = (t_mark - t_infer) * 1000.0
+                stage_inference.observe(infer_ms)
+                FRAMES_INFERRED.inc()
+                if motion_gate is not None:
+                    motion_gate.add_inference_time(infer_ms)
             except Exception as e:
-                print("WARNING: Resize failed:", e)
+                print("WARNING: model inference failed on this frame:", e)
+                # show frame anyway and continue
+                output_frame(frame)
+                if not headless and cv2.waitKey(1) & 0xFF == 27:
+                    break
+                frame_idx += 1
+                continue
 
-        # FRAME_SKIP logic: if >0, skip model inference on some frames
-        if FRAME_SKIP > 0 and (frame_idx % (FRAME_SKIP + 1) != 0):
-            # Just display and optionally record without running inference
-            if resize:
-                display_frame = frame.copy()
+            # Extract detections once per frame as arrays, threshold/class filter as masks,
+            # boxes mapped from the model input back to frame coordinates
+            try:
+                xyxy, cls, conf = extract_detections(results[0] if results else None, min_conf_thresh, COUNT_CLASSES,
+                                                     scale=scaler.scale, offset=(off_x, off_y))
+            except Exception as e:
+                print("WARNING: could not read detections for this frame:", e)
+                xyxy, cls, conf = extract_detections(None, min_conf_thresh)
+
+            zone_counts = None
+            if zone_counter is not None:
+                # each box goes to the zone holding its center; boxes outside all zones are ignored
+                zone_idx, zone_counts = zone_counter.assign(xyxy)
+                inside = zone_idx >= 0
+                xyxy, cls, conf = xyxy[inside], cls[inside], conf[inside]
+
+            object_count = len(conf)
+            if tracker is not None:
+                # count confirmed tracks instead of this frame's boxes -> no flicker
+                for event, track_id in tracker.update(xyxy):
+                    print(f"{'➡️ Entry' if event == 'entry' else '⬅️ Exit'}: person #{track_id}")
+                tracked_xyxy = tracker.confirmed_boxes()
+                object_count = len(tracked_xyxy)
+                if zone_counter is not None:
+                    _, zone_counts = zone_counter.assign(tracked_xyxy)
+
+            tracks = tracker.snapshot() if tracker is not None else None
+            t_now = time.perf_counter()
+            stage_post.observe((t_now - t_mark) * 1000.0)
+            output_frame(frame, (xyxy, cls, conf), zone_counts, tracks, overlay_lines(object_count))
+            t_mark = time.perf_counter()
+            stage_output.observe((t_mark - t_now) * 1000.0)
+            last_object_count = object_count
+            if zone_counts is not None:
+                for zone_name, zone_count in zone_counts.items():
+                    report_count(zone_name, zone_count)
             else:
-                display_frame = frame
-            cv2.imshow('YOLO detection results', display_frame)
-            if recorder is not None:
-                recorder.write(display_frame)
-            frame_idx += 1
-            if cv2.waitKey(1) & 0xFF == 27:
-                break
-            # update FPS bookkeeping quickly (approx)
+                report_count(area_name, object_count)
+            stage_report.observe((time.perf_counter() - t_mark) * 1000.0)
+
+            if first_detection is None:
+                first_detection = time.perf_counter() - started
+                STARTUP_SECONDS.labels('first_detection').set(first_detection)
+                print(f"⚡ First count reported {first_detection:.2f} s after start")
+
+            # Keys: q to quit, s to pause, p to save frame
+            if not headless:
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    break
+                elif key == ord('s'):
+                    cv2.waitKey(0)
+                elif key == ord('p'):
+                    cv2.imwrite('capture.png', frame)
+
+            # FPS bookkeeping
             t_stop = time.perf_counter()
             frame_rate_calc = float(1.0 / max((t_stop - t_start), 1e-6))
-            frame_rate_buffer.append(frame_rate_calc)
-            if len(frame_rate_buffer) > fps_avg_len:
+            if len(frame_rate_buffer) >= fps_avg_len:
                 frame_rate_buffer.pop(0)
+            frame_rate_buffer.append(frame_rate_calc)
             avg_frame_rate = float(np.mean(frame_rate_buffer))
-            continue
 
-        # -----------------------
-        # Run inference (wrapped with try/except so a single bad frame won't crash)
-        # -----------------------
-        results = None
-        try:
-            # Using direct call on frame (Ultralytics supports this)
-            results = model(frame, verbose=False)
-        except Exception as e:
-            print("WARNING: model inference failed on this frame:", e)
-            # show frame anyway and continue
-            cv2.imshow('YOLO detection results', frame)
-            if recorder is not None:
-                recorder.write(frame)
-            if cv2.waitKey(1) & 0xFF == 27:
-                break
+            if imgsz_controller is not None:
+                # time spent on the frame, not waiting for the camera: a camera-limited loop is not too slow
+                new_imgsz = imgsz_controller.update(t_stop - t_acquired)
+                if new_imgsz is not None:
+                    print(f"📐 Inference size {scaler.imgsz} -> {new_imgsz} "
+                          f"({imgsz_controller.last_fps:.1f} FPS, target {imgsz_controller.target_fps:g})")
+                    scaler.imgsz = new_imgsz
+
             frame_idx += 1
-            continue
 
-        # Extract detections safely
-        detections = []
-        try:
-            if results and len(results) > 0:
-                detections = results[0].boxes  # Ultralytics Boxes object (iterable)
-        except Exception:
-            detections = []
-
-        # --- Database setup (Keshab edit 0) ---
-        conn = sqlite3.connect("cams.db", check_same_thread=False)
-        cursor = conn.cursor()
-
-        # helper function to insert status
-        def update_status(area, count):
-            # decide status label
-            if count == 0:
-                status = "empty"
-            elif count < 10:
-                status = "open"
-            elif count < 30:
-                status = "busy"
-            else:
-                status = "full"
-
-            cursor.execute("""
-                INSERT INTO area_status (area, people_count, status, updated_at)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(area) DO UPDATE SET
-                    people_count = excluded.people_count,
-                    status = excluded.status,
-                    updated_at = excluded.updated_at
-            """, (area, count, status, int(time.time())))
-            conn.commit()   
-
-        object_count = 0
-        # Iterate detections
-        for i in range(len(detections)):
-            try:
-                # xyxy as tensor -> ensure CPU -> numpy
-                xyxy_tensor = detections[i].xyxy
+    except KeyboardInterrupt:
+        print("Interrupted by user")
+
+    finally:
+        # Cleanup
+        print(f'Average pipeline FPS: {avg_frame_rate:.2f}')
+        print(f'Last detected people count: {last_object_count}')
+        if first_detection is not None:
+            print(f'Time to first detection: {first_detection:.2f} s')
+        if imgsz_controller is not None:
+            print(f'Inference size: {scaler.imgsz} ({imgsz_controller.changes} changes)')
+        if motion_gate is not None and motion_gate.frames_checked:
+            print(f"Motion gate: {gate_summary()}")
+        if tracker is not None:
+            print(f"Tracker: {tracker.entries} entries, {tracker.exits} exits, {tracker.next_id - 1} tracks seen")
+        if grabber is not None:
+            grabber.stop()
+            cap = grabber.cap  # a reconnect replaces the capture
+            cap_stats = grabber.stats()
+            print(f"Frames captured: {cap_stats['captured']}, processed: {cap_stats['processed']}, dropped: {cap_stats['dropped']}")
+            if cap_stats['disconnects']:
+                print(f"Disconnects: {cap_stats['disconnects']}, reconnects: {cap_stats['reconnects']}, "
+                      f"downtime: {cap_stats['downtime_seconds']:.1f} s")
+        if cap is not None:
+            if source_type == 'picamera':
                 try:
-                    xyxy_cpu = xyxy_tensor.cpu().numpy().squeeze()
+                    cap.stop()
                 except Exception:
-                    # sometimes it's already numpy
-                    xyxy_cpu = np.array(xyxy_tensor).squeeze()
-                # if it's a single-detection it may be 1D; ensure shape (4,)
-                if xyxy_cpu.ndim == 2:
-                    # If multiple boxes (shouldn't happen per index), take first
-                    xyxy = xyxy_cpu[0]
-                else:
-                    xyxy = xyxy_cpu
-                xmin, ymin, xmax, ymax = xyxy.astype(int)
-
-                # class and confidence
-                # detections[i].cls may be tensor; .item() to scalar
-                classidx = int(detections[i].cls.item()) if hasattr(detections[i].cls, 'item') else int(detections[i].cls)
-                classname = labels[classidx] if classidx in labels else str(classidx)
-                conf = float(detections[i].conf.item()) if hasattr(detections[i].conf, 'item') else float(detections[i].conf)
-
-                # Draw only if above threshold
-                if conf >= MIN_CONF_THRESH:
-                    color = bbox_colors[classidx % len(bbox_colors)]
-                    cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, 2)
-                    label = f'{classname}: {int(conf*100)}%'
-                    labelSize, baseLine = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-                    label_ymin = max(ymin, labelSize[1] + 10)
-                    cv2.rectangle(frame, (xmin, label_ymin - labelSize[1] - 10), (xmin + labelSize[0], label_ymin + baseLine - 10), color, cv2.FILLED)
-                    cv2.putText(frame, label, (xmin, label_ymin - 7), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
-                    object_count += 1
-            except Exception as e:
-                # protect against any per-detection error
-                # print("Per-detection warning:", e)
-                continue
-
-        # Draw FPS and count for camera/video sources
-        if source_type in ('video', 'usb', 'picamera', 'stream'):
-            cv2.putText(frame, f'FPS: {avg_frame_rate:0.2f}', (10,20), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
-
-        cv2.putText(frame, f'Number of objects: {object_count}', (10,40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
-        cv2.imshow('YOLO detection results', frame)
-        last_object_count = object_count
-        update_databases("Library", object_count)
-
-        # --- Database update every 10 seconds (Keshab edit 0) --- 
-        if 'last_db_time' not in globals():
-            last_db_time = 0
-
-        now = time.time()
-        if now - last_db_time >= 10:  # every 10 sec
-            last_db_time = now
-            update_status("Library", object_count)   # change "library" per camera/area
-            print(f"📥 Saved to DB: area=Library, count={object_count}")
-        # (Keshab edit 1)
-
-        # --- Send data to backend every POST_INTERVAL seconds ---
-        if POST_TO_SERVER:
-            now = time.time()
-            if now - last_post_time >= POST_INTERVAL:
-                last_post_time = now
-                data = {
-                    "area": "Library",             # change this to the actual area name
-                    "people_count": object_count,  # send the current detection count
-                    "timestamp": int(now)
-                }
+                    pass
+            else:
                 try:
-                    resp = requests.post(SERVER_POST_URL, json=data, timeout=2)
-                    if resp.status_code == 200:
-                        # print(f"✅ Sent to server: {data}")
-                        print(f"🌐 Sent to server ...")
-                    else:
-                        print("⚠️ Server error:", resp.status_code)
-                except Exception as e:
-                    print("⚠️ Failed to POST to server:", e)
-
-
-        # Keys: q to quit, s to pause, p to save frame
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == ord('s'):
-            cv2.waitKey(0)
-        elif key == ord('p'):
-            cv2.imwrite('capture.png', frame)
-
-        # FPS bookkeeping
-        t_stop = time.perf_counter()
-        frame_rate_calc = float(1.0 / max((t_stop - t_start), 1e-6))
-        if len(frame_rate_buffer) >= fps_avg_len:
-            frame_rate_buffer.pop(0)
-        frame_rate_buffer.append(frame_rate_calc)
-        avg_frame_rate = float(np.mean(frame_rate_buffer))
-
-        frame_idx += 1
-
-except KeyboardInterrupt:
-    print("Interrupted by user")
-
-finally:
-    # Cleanup
-    print(f'Average pipeline FPS: {avg_frame_rate:.2f}')
-    print(f'Last detected people count: {last_object_count}')
-    if cap is not None:
-        if source_type == 'picamera':
-            try:
-                cap.stop()
-            except Exception:
-                pass
-        else:
-            try:
-                cap.release()
-            except Exception:
-                pass
-    if recorder is not None:
-        try:
-            recorder.release()
-        except Exception:
-            pass
-    cv2.destroyAllWindows()
-    conn.close()
\ No newline at end of file
+                    cap.release()
+                except Exception:
+                    pass
+        if annotator is not None:
+            annotator.close()
+            ann_stats = annotator.stats()
+            print(f"Annotated frames: {ann_stats['drawn']} of {ann_stats['submitted']}")
+        if recorder is not None:
+            recorder.close()
+            rec_stats = recorder.stats()
+            print(f"Recorded frames: {rec_stats['frames_written']} at {rec_stats['fps']:.1f} FPS, dropped: {rec_stats['frames_dropped']}, "
+                  f"files: {', '.join(rec_stats['segments']) or 'none'}")
+        if not headless or args.preview:
+            cv2.destroyAllWindows()
+        close_writers()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import json
+
+import cv2
+import numpy as np
+
+
+zone_colors = [(0,200,255), (255,120,0), (120,255,0), (255,0,200), (0,120,255), (200,255,0)]
+
+
+# -------------------
+# Region-of-interest zones
+# -------------------
+def load_zones(spec):
+    """Zones from a JSON file path or an already-parsed dict.
+
+    Format: {"Zone name": [[x, y], [x, y], [x, y], ...], ...} with points in
+    the coordinates of the frame the detector sees (after --resolution).
+    """
+    if isinstance(spec, str):
+        with open(spec, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError('zones must be a JSON object of {"Zone name": [[x, y], ...]}')
+
+    zones = {}
+    for name, points in spec.items():
+        polygon = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        if len(polygon) < 3:
+            raise ValueError(f'zone "{name}" needs at least 3 points')
+        zones[str(name)] = polygon
+    return zones
+
+
+class ZoneCounter:
+    """Crops frames to the zones and counts detections per zone.
+
+    Only the union bounding box of all polygons is sent to the model. Each box
+    belongs to the zone that contains its center point (first zone wins where
+    polygons overlap); boxes outside every zone are ignored.
+    """
+
+    def __init__(self, zones):
+        self.zones = zones
+        self.names = list(zones)
+        self.shape = None
+        self.label_mask = None
+        self.crop_box = None
+
+    def _prepare(self, frame_shape):
+        # zone label image: 0 = outside, i + 1 = self.names[i]
+        h, w = frame_shape[:2]
+        self.shape = (h, w)
+        self.label_mask = np.zeros((h, w), dtype=np.uint8)
+        for i, name in reversed(list(enumerate(self.names))):
+            cv2.fillPoly(self.label_mask, [self.zones[name]], i + 1)
+
+        all_points = np.concatenate(list(self.zones.values()))
+        x0, y0 = np.clip(all_points.min(axis=0), 0, [w - 1, h - 1])
+        x1, y1 = np.clip(all_points.max(axis=0) + 1, 1, [w, h])
+        self.crop_box = (int(x0), int(y0), int(x1), int(y1))
+
+    def crop(self, frame):
+        """Return (crop, (x_offset, y_offset)) covering every zone."""
+        if self.shape != frame.shape[:2]:
+            self._prepare(frame.shape)
+        x0, y0, x1, y1 = self.crop_box
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+    def assign(self, xyxy):
+        """Per-box zone index (-1 = outside) and {zone name: count}, boxes in frame coords."""
+        if len(xyxy) == 0:
+            return np.empty(0, dtype=int), {name: 0 for name in self.names}
+
+        h, w = self.shape
+        cx = np.clip((xyxy[:, 0] + xyxy[:, 2]) // 2, 0, w - 1)
+        cy = np.clip((xyxy[:, 1] + xyxy[:, 3]) // 2, 0, h - 1)
+        zone_idx = self.label_mask[cy, cx].astype(int) - 1
+        counts = np.bincount(zone_idx[zone_idx >= 0], minlength=len(self.names))
+        return zone_idx, {name: int(counts[i]) for i, name in enumerate(self.names)}
+
+    def draw(self, frame, counts=None):
+        for i, name in enumerate(self.names):
+            color = zone_colors[i % len(zone_colors)]
+            polygon = self.zones[name]
+            cv2.polylines(frame, [polygon], True, color, 2)
+            label = name if counts is None else f'{name}: {counts.get(name, 0)}'
+            x, y = polygon.min(axis=0)
+            cv2.putText(frame, label, (int(x) + 5, int(y) + 20), cv2.FONT_HERSHEY_SIMPLEX, .6, color, 2)
+        return frame